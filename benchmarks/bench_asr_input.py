@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Per-utterance cost of getting captured PCM into Whisper: the old temp-WAV path
+(write a .wav, then Whisper decodes it via ffmpeg) vs the in-memory float32 path
+    python benchmarks/bench_asr_input.py [utterances] [seconds]
+Model inference is the same either way and is not included. Without ffmpeg on
+PATH the WAV is read back with the wave module, which is a lower bound on the
+old path's decode cost.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'gui'))
+
+from asr import SAMPLE_RATE, pcm_to_float32
+
+FFMPEG = shutil.which('ffmpeg')
+
+
+def fake_utterance(seconds):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 3000).astype(np.int16).tobytes()
+
+
+def via_temp_wav(pcm):
+    """What start_listening/_process_audio used to do; returns bytes written to disk"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp:
+        with wave.open(tmp.name, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm)
+        path = tmp.name
+    if FFMPEG:
+        # whisper.load_audio
+        out = subprocess.run([FFMPEG, '-nostdin', '-threads', '0', '-i', path, '-f', 's16le',
+                              '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-'],
+                             capture_output=True, check=True).stdout
+    else:
+        with wave.open(path, 'rb') as wf:
+            out = wf.readframes(wf.getnframes())
+    np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+    written = os.path.getsize(path)
+    os.remove(path)  # the GUIs never did; each utterance stayed in /tmp
+    return written
+
+
+def in_memory(pcm):
+    pcm_to_float32(pcm)
+    return 0
+
+
+def run(convert, pcm, utterances):
+    timings, written = [], 0
+    for _ in range(utterances):
+        start = time.perf_counter()
+        written += convert(pcm)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000, written
+
+
+def main():
+    utterances = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pcm = fake_utterance(seconds)
+    print(f"{utterances} utterances of {seconds:g}s  (decoder: {'ffmpeg' if FFMPEG else 'wave'})")
+    for name, convert in (('temp wav', via_temp_wav), ('in-memory', in_memory)):
+        p50, p95, written = run(convert, pcm, utterances)
+        print(f"{name:10s} p50 {p50:7.3f} ms  p95 {p95:7.3f} ms  "
+              f"disk writes {written / utterances / 1024:6.1f} KiB/utterance")
+
+
+if __name__ == '__main__':
+    main()
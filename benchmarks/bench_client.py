@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Per-turn latency: a fresh requests.post per message vs the pooled NeoMindClient
+Start the sample server first, then:
+    python benchmarks/bench_client.py [server_url] [turns]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'gui'))
+
+import requests
+
+from neomind_client import NeoMindClient
+
+
+def fresh_connection(url, message):
+    return requests.post(f"{url}/chat/text", json={'message': message, 'child_name': 'bench'},
+                         timeout=5).json()
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def run(send, turns):
+    timings = []
+    for i in range(turns):
+        start = time.perf_counter()
+        send(f"what is number {i}")
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else 'http://localhost:5000'
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    client = NeoMindClient(url)
+    client.health()
+
+    p50, p95 = run(lambda message: fresh_connection(url, message), turns)
+    print(f"fresh connection: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms")
+    p50, p95 = run(lambda message: client.chat(message, 'bench'), turns)
+    print(f"pooled client:    p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  (http2={client.http2})")
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
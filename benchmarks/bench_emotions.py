@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Emotion classification throughput and the GUI's per-response lookup
+Usage: python benchmarks/bench_emotions.py [responses]
+The server side runs EmotionClassifier once per response. The GUI side used
+to rescan every response for keywords and then walk an if/elif chain for the
+colour; now it does one STYLES lookup on the emotion name.
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(0, os.path.join(ROOT, 'gui'))
+
+from emotion_styles import style
+from emotions import EmotionClassifier
+from intents import FALLBACK_RESPONSE, INTENTS
+
+SAMPLES = [template.format(child_name='Sam') for _, _, template in INTENTS] + [
+    FALLBACK_RESPONSE.format(child_name='Sam'),
+    "I'm sorry, I'm not sure I understood. Can you say that again?",
+    "Hmm, I don't know that one yet, but it sounds amazing!",
+]
+
+
+def keyword_scan(response):
+    """The GUIs' original process_message mapping, for comparison"""
+    lowered = response.lower()
+    if any(word in lowered for word in ('great', 'awesome', 'amazing')):
+        return "Excited :D"
+    if any(word in lowered for word in ('confused', 'sorry', 'not sure')):
+        return "Confused ?"
+    return "Happy :)"
+
+
+def colour_chain(emotion_text):
+    """The GUIs' original set_emotion colour selection"""
+    for key, colour in (("Happy", "lightyellow"), ("Excited", "lightpink"), ("Think", "lightcyan"),
+                        ("Listen", "lightblue"), ("Confused", "wheat")):
+        if key in emotion_text:
+            return colour
+    return "lightgray"
+
+
+def throughput(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(1)
+    responses = [rng.choice(SAMPLES) for _ in range(n)]
+    classifier = EmotionClassifier()
+    names = [classifier.classify(response)[0] for response in responses]
+    labels = [keyword_scan(response) for response in responses]
+
+    print(f"{n:,} responses, one core")
+    print(f"  server  EmotionClassifier:      {throughput(classifier.classify, responses):>12,.0f} /s")
+    print(f"  client  keyword scan + colours: "
+          f"{throughput(lambda r: colour_chain(keyword_scan(r)), responses):>12,.0f} /s")
+    print(f"  client  colours only (chain):   {throughput(colour_chain, labels):>12,.0f} /s")
+    print(f"  client  STYLES lookup:          {throughput(style, names):>12,.0f} /s")
+
+    for response in SAMPLES[-2:]:
+        print(f"  {response[:40]!r}: scan={keyword_scan(response)} classifier={classifier.classify(response)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Fallback responder throughput: chained substring any() passes vs IntentMatcher
+Usage: python benchmarks/bench_intents.py [messages]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from intents import INTENTS, IntentMatcher
+
+SAMPLES = [
+    "hi neo", "hello!", "what is a volcano", "why is the sky blue", "i like numbers",
+    "can we do an experiment", "i want to draw a cat", "read me a story please",
+    "let's play a game", "my dog is called biscuit", "this is whatever",
+    "i went to the park with my grandma and we saw ducks",
+]
+
+
+def substring_classify(message):
+    """The original generate_simple_response matching, for comparison"""
+    message_lower = message.lower()
+    for name, keywords, _ in INTENTS:
+        if any(word in message_lower for word in list(keywords)):
+            return name
+    return 'chat'
+
+
+def throughput(classify, messages):
+    start = time.perf_counter()
+    for message in messages:
+        classify(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(1)
+    messages = [rng.choice(SAMPLES) for _ in range(n)]
+    matcher = IntentMatcher()
+
+    print(f"{n:,} messages, one core")
+    print(f"  substring any(): {throughput(substring_classify, messages):>10,.0f} msgs/s")
+    print(f"  IntentMatcher:   {throughput(matcher.classify, messages):>10,.0f} msgs/s")
+
+    for message in ("this is whatever", "hi neo, what is math?"):
+        print(f"  {message!r}: substring={substring_classify(message)} "
+              f"matcher={matcher.classify(message)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark /memories/search ranking at large history sizes
+Usage: python benchmarks/bench_memory_search.py [turns]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from memory_index import ChildIndex
+
+WORDS = ("dinosaur rocket volcano math numbers science experiment painting story book "
+         "game soccer puppy kitten ocean planet robot castle dragon music piano garden "
+         "rainbow pizza bicycle moon star tree river forest snow summer").split()
+FILLER = "i like the a my we it is and really so today what about".split()
+
+
+def make_message(rng):
+    words = rng.choices(FILLER, k=rng.randint(2, 8)) + rng.choices(WORDS, k=rng.randint(1, 3))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    index = ChildIndex()
+
+    start = time.perf_counter()
+    for turn_id in range(turns):
+        index.add(turn_id, make_message(rng))
+    build = time.perf_counter() - start
+    print(f"Indexed {turns:,} turns in {build:.2f}s ({build / turns * 1e6:.1f} µs/turn)")
+
+    queries = [" ".join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(500)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, 5)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"Search p50: {timings[len(timings) // 2] * 1e3:.3f} ms  "
+          f"p99: {timings[int(len(timings) * 0.99)] * 1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Time to first audio: rendering a whole reply vs its first sentence
+    python benchmarks/bench_tts.py [runs]
+Needs pyttsx3 with a working driver (espeak on Linux). Times save_to_file()
++ runAndWait() on a bare engine, which is what SpeechPipeline's render
+thread does for a cache miss. Playback is not included; with the pipeline
+the rest of the reply renders while the first sentence plays.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'gui'))
+
+import pyttsx3
+
+from tts import split_sentences
+
+REPLIES = (
+    "That's a great question, Sam! Let me think about that. What specifically interests you about this topic?",
+    "Science is amazing, Sam! There's so much to discover. What scientific concept fascinates you?",
+    "I love stories too, Sam! Stories help us learn about the world. What's your favorite type of story?",
+)
+
+
+def render(engine, text, path):
+    """Seconds to synthesize text to a WAV, as the pipeline's render thread does"""
+    start = time.perf_counter()
+    engine.save_to_file(text, path)
+    engine.runAndWait()
+    return time.perf_counter() - start
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # No SpeechPipeline: its threads and cancel hook would share the engine
+    engine = pyttsx3.init()
+    fd, path = tempfile.mkstemp(prefix="bench-tts-", suffix=".wav")
+    os.close(fd)
+    whole, first = [], []
+    try:
+        for _ in range(runs):
+            for reply in REPLIES:
+                whole.append(render(engine, reply, path))
+                first.append(render(engine, split_sentences(reply)[0], path))
+    finally:
+        os.remove(path)
+    for name, timings in (('whole reply', whole), ('first sentence', first)):
+        timings.sort()
+        print(f"{name:15s} p50 {timings[len(timings) // 2] * 1000:7.1f} ms  "
+              f"max {timings[-1] * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
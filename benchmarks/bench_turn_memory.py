@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Bytes per stored turn, message included: the old dict-of-strings layout vs turns.Turn
+Usage: python benchmarks/bench_turn_memory.py [turns]
+"""
+
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from turns import Speaker, Turn
+
+CHILD_MESSAGES = ["hi", "hello neo", "what is a volcano", "i like math", "tell me a story",
+                  "can we play a game", "why is the sky blue", "i drew a dinosaur"]
+NEO_MESSAGES = [
+    "Hello friend! How are you doing today? What would you like to learn about?",
+    "That's a great question, friend! Let me think about that. What specifically interests you about this topic?",
+    "I love math, friend! Math is like solving fun puzzles. What math problem are you working on?",
+    "That's interesting, friend! Tell me more about what you're thinking. I'm here to learn and explore with you!",
+]
+
+
+def messages(n):
+    """Unique strings, as real conversations are; numbered so none are shared"""
+    rng = random.Random(7)
+    for i in range(n):
+        pool = CHILD_MESSAGES if i % 2 == 0 else NEO_MESSAGES
+        yield i, f"{rng.choice(pool)} ({i})"
+
+
+def as_dicts(n):
+    return [{
+        'timestamp': datetime.now().isoformat(),
+        'message': message,
+        'type': 'user' if i % 2 == 0 else 'neo'
+    } for i, message in messages(n)]
+
+
+def as_turns(n):
+    return [Turn(message, Speaker.USER if i % 2 == 0 else Speaker.NEO)
+            for i, message in messages(n)]
+
+
+def measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    turns = build(n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del turns
+    return current / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    before = measure(as_dicts, n)
+    after = measure(as_turns, n)
+    print(f"{n:,} turns")
+    print(f"  dict turn:  {before:7.1f} bytes/turn")
+    print(f"  Turn:       {after:7.1f} bytes/turn  ({before / after:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Wake-word spotter on recorded audio: idle CPU and false wakes
+    python benchmarks/bench_wakeword.py <templates_dir> <negatives_dir> [positives_dir] [--whisper]
+Each WAV (16 kHz mono 16-bit) is one VAD utterance, as the kiosk would hand
+it over. Negatives are background speech, TV or room noise the kiosk hears
+while IDLE. Positives are the wake word. CPU% is detector CPU time over the
+duration of the negative audio, i.e. what the IDLE kiosk spends per second of
+chatter. --whisper runs tiny.en on the negatives for comparison.
+"""
+
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'gui'))
+
+from wakeword import SAMPLE_RATE, WakeWordDetector, read_wav
+
+
+def load(path):
+    return [read_wav(wav) for wav in sorted(glob.glob(os.path.join(path, '*.wav')))]
+
+
+def seconds(utterances):
+    return sum(len(pcm) for pcm in utterances) / 2 / SAMPLE_RATE
+
+
+def run(detect, utterances):
+    cpu = time.process_time()
+    fired = sum(1 for pcm in utterances if detect(pcm))
+    return fired, time.process_time() - cpu
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) < 2:
+        sys.exit(__doc__)
+    detector = WakeWordDetector.from_dir(args[0])
+    if not detector.ready:
+        sys.exit("Need at least two templates")
+    negatives = load(args[1])
+    audio = seconds(negatives)
+    print(f"{len(detector.templates)} templates, threshold {detector.threshold:.2f}")
+    print(f"negatives: {len(negatives)} utterances, {audio:.0f}s of audio")
+
+    false_wakes, cpu = run(detector.detect, negatives)
+    print(f"spotter  CPU {cpu / audio * 100:6.2f}%  "
+          f"false wakes {false_wakes}/{len(negatives)} ({false_wakes / audio * 3600:.1f}/hour)")
+
+    if len(args) > 2:
+        positives = load(args[2])
+        hits, _ = run(detector.detect, positives)
+        print(f"positives: {hits}/{len(positives)} detected")
+
+    if '--whisper' in sys.argv:
+        import whisper
+        from asr import transcribe_pcm
+        model = whisper.load_model('tiny.en')
+        words = ('hey', 'hi', 'hello')
+        false_wakes, cpu = run(lambda pcm: transcribe_pcm(model, pcm).lower().startswith(words),
+                               negatives)
+        print(f"whisper  CPU {cpu / audio * 100:6.2f}%  "
+              f"false wakes {false_wakes}/{len(negatives)} ({false_wakes / audio * 3600:.1f}/hour)")
+
+
+if __name__ == '__main__':
+    main()
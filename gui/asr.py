@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Speech-to-text helpers for the NeoMind GUIs
+Captured int16 PCM goes to Whisper as a float32 array in memory. Nothing is
+written to /tmp, and Whisper skips the ffmpeg decode/resample it runs for
+file paths. The mic is already opened at Whisper's 16 kHz mono.
+
+Endpointer splits the live mic stream into utterances with webrtcvad, so
+recognition starts as soon as the child stops talking rather than after a
+fixed-length recording.
+
+ASRClient talks to the shared ASR service (asr_service.py). Wherever a
+Whisper model is expected here, a client can be passed instead.
+
+PartialTranscriber re-decodes a growing utterance while the child is still
+talking. Words that two decodes in a row agree on are committed, so the
+final pass only decodes the audio after them.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper's native rate; the mic is opened at this rate
+
+# webrtcvad accepts 10, 20 or 30 ms frames
+VAD_FRAME_MS = 30
+VAD_AGGRESSIVENESS = int(os.environ.get('NEOMIND_VAD_AGGRESSIVENESS', 2))
+# Silence that ends an utterance
+VAD_HANGOVER_MS = int(os.environ.get('NEOMIND_VAD_HANGOVER_MS', 500))
+# Give up listening when nobody starts talking within this many seconds
+NO_SPEECH_TIMEOUT = 8
+
+# New speech between partial re-decodes
+PARTIAL_STEP_MS = int(os.environ.get('NEOMIND_PARTIAL_STEP_MS', 1000))
+
+ASR_SERVICE_URL = os.environ.get('NEOMIND_ASR_URL', 'http://127.0.0.1:5100')
+
+# pcm: int16 bytes; speech_ended: perf_counter() of the last voiced frame
+Utterance = namedtuple('Utterance', 'pcm speech_ended')
+
+
+def pcm_to_float32(pcm):
+    """int16 PCM bytes -> float32 samples in [-1, 1)
+
+    np.frombuffer views the bytes without copying. The single float32 buffer
+    is then scaled in place.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    samples *= 1 / 32768
+    return samples
+
+
+class ASRClient:
+    """Client for the shared ASR service; stands in for a local Whisper model"""
+
+    def __init__(self, base_url=ASR_SERVICE_URL, timeout=30):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def available(self, timeout=0.5):
+        try:
+            return self._session.get(f"{self.base_url}/health", timeout=timeout).status_code == 200
+        except Exception:
+            return False
+
+    def transcribe(self, pcm, prompt=None, word_timestamps=False):
+        """Return the service's result dict: text (+ segments with word ends)"""
+        params = {}
+        if prompt:
+            params['prompt'] = prompt
+        if word_timestamps:
+            params['word_timestamps'] = '1'
+        response = self._session.post(f"{self.base_url}/transcribe", data=pcm, params=params,
+                                      headers={'Content-Type': 'application/octet-stream'},
+                                      timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def connect_asr_service():
+    """An ASRClient if the shared service is running, else None"""
+    client = ASRClient()
+    return client if client.available() else None
+
+
+def transcribe_pcm(model, pcm, **options):
+    """Transcribe 16 kHz mono int16 PCM with a Whisper model or ASRClient; returns stripped text"""
+    if not pcm:
+        return ""
+    if isinstance(model, ASRClient):
+        return model.transcribe(pcm)["text"].strip()
+    options.setdefault('fp16', False)  # CPU inference; avoids the fp16 fallback warning
+    return model.transcribe(pcm_to_float32(pcm), **options)["text"].strip()
+
+
+class Endpointer:
+    """Turn fixed-size PCM frames into utterances using webrtcvad
+
+    Until speech starts, frames wait in a short pre-roll ring buffer so the
+    first syllable is kept. Speech starts once most of the ring is voiced. It
+    ends after `hangover_ms` of continuous silence, or at `max_utterance_ms`.
+    """
+
+    TRIGGER_RATIO = 0.6
+
+    def __init__(self, vad=None, rate=SAMPLE_RATE, frame_ms=VAD_FRAME_MS,
+                 hangover_ms=VAD_HANGOVER_MS, preroll_ms=300, max_utterance_ms=15000):
+        if vad is None:
+            import webrtcvad
+            vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        self.vad = vad
+        self.rate = rate
+        self.frame_samples = rate * frame_ms // 1000
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_frames = max_utterance_ms // frame_ms
+        self._ring = deque(maxlen=max(1, preroll_ms // frame_ms))  # (frame, voiced)
+        self._frames = []
+        self._silence = 0
+        self._last_voiced = None
+
+    @property
+    def in_speech(self):
+        return bool(self._frames)
+
+    def feed(self, frame, now=None):
+        """Add one frame; returns an Utterance when speech has just ended, else None"""
+        now = time.perf_counter() if now is None else now
+        voiced = self.vad.is_speech(frame, self.rate)
+        if not self._frames:
+            self._ring.append((frame, voiced))
+            if sum(v for _, v in self._ring) >= self.TRIGGER_RATIO * self._ring.maxlen:
+                self._frames = [f for f, _ in self._ring]
+                self._ring.clear()
+                self._silence = 0
+                self._last_voiced = now
+            return None
+
+        self._frames.append(frame)
+        if voiced:
+            self._silence = 0
+            self._last_voiced = now
+        else:
+            self._silence += 1
+        if self._silence >= self.hangover_frames or len(self._frames) >= self.max_frames:
+            return self._cut()
+        return None
+
+    def flush(self):
+        """End any utterance in progress (e.g. the stream is closing)"""
+        return self._cut() if self._frames else None
+
+    def _cut(self):
+        # Trailing hangover silence is dropped; Whisper only needs the speech
+        frames = self._frames[:len(self._frames) - self._silence]
+        utterance = Utterance(b"".join(frames), self._last_voiced)
+        self._frames, self._silence = [], 0
+        return utterance
+
+
+def capture_utterance(stream, endpointer, keep_going, no_speech_timeout=NO_SPEECH_TIMEOUT):
+    """Read frames from a PyAudio input stream until one utterance ends
+
+    Returns None if keep_going() turns false or nobody speaks before the
+    timeout.
+    """
+    deadline = time.perf_counter() + no_speech_timeout
+    while keep_going():
+        frame = stream.read(endpointer.frame_samples, exception_on_overflow=False)
+        utterance = endpointer.feed(frame)
+        if utterance:
+            return utterance
+        if not endpointer.in_speech and time.perf_counter() > deadline:
+            return None
+    return None
+
+
+def _word_key(word):
+    return re.sub(r"[^a-z0-9']", "", word.lower())
+
+
+class PartialTranscriber:
+    """Interim hypotheses for one utterance, decoded on a background worker
+
+    Every `step_ms` of new speech, the audio after the committed prefix is
+    re-decoded with the committed text as the prompt. Words that match the
+    previous hypothesis are committed, up to the word end timestamp (the
+    LocalAgreement rule). finish() then decodes only the uncommitted tail.
+    `lock` serialises calls into the shared Whisper model.
+    """
+
+    def __init__(self, model, on_partial=None, lock=None, step_ms=PARTIAL_STEP_MS):
+        self.model = model
+        self.on_partial = on_partial
+        self.lock = lock or threading.Lock()
+        self.step_bytes = SAMPLE_RATE * step_ms // 1000 * 2
+        self._cond = threading.Condition()
+        self._pcm = bytearray()
+        self._decoded_upto = 0      # len(_pcm) at the last partial decode
+        self._committed_bytes = 0   # PCM covered by the committed text
+        self._committed_text = ""
+        self._hypothesis = []       # uncommitted words of the last decode
+        self._decoding = False
+        self._finished = False
+        threading.Thread(target=self._run, name="neomind-partials", daemon=True).start()
+
+    @property
+    def committed_seconds(self):
+        return self._committed_bytes / 2 / SAMPLE_RATE
+
+    def append(self, pcm):
+        with self._cond:
+            self._pcm.extend(pcm)
+            if len(self._pcm) - self._decoded_upto >= self.step_bytes:
+                self._cond.notify_all()
+
+    def finish(self):
+        """Final text for the utterance; blocks until any partial decode is done"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: not self._decoding)
+            tail = bytes(self._pcm[self._committed_bytes:])
+            prefix = self._committed_text
+        if len(tail) < 2 * SAMPLE_RATE // 10:  # < 100 ms left: nothing worth decoding
+            return prefix.strip()
+        tail_text = self._transcribe(tail, prefix)["text"]
+        return " ".join(part.strip() for part in (prefix, tail_text) if part.strip())
+
+    def cancel(self):
+        """Drop the utterance without a final pass"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._finished or
+                                    len(self._pcm) - self._decoded_upto >= self.step_bytes)
+                if self._finished:
+                    return
+                self._decoding = True
+                self._decoded_upto = len(self._pcm)
+                pcm = bytes(self._pcm[self._committed_bytes:])
+                prompt = self._committed_text
+            text = None
+            try:
+                result = self._transcribe(pcm, prompt, word_timestamps=True)
+                words = [(w["word"], w["end"]) for segment in result["segments"]
+                         for w in segment.get("words", ())]
+                text = self._agree(words)
+            except Exception as e:
+                print(f"Partial transcription error: {e}")
+            with self._cond:
+                self._decoding = False
+                self._cond.notify_all()
+            if text and self.on_partial:
+                self.on_partial(text)
+
+    def _agree(self, words):
+        """Commit the prefix this decode shares with the previous one; return the full hypothesis"""
+        agreed = 0
+        for (previous, _), (word, _) in zip(self._hypothesis, words):
+            if _word_key(previous) != _word_key(word):
+                break
+            agreed += 1
+        with self._cond:
+            if agreed:
+                self._committed_text += "".join(word for word, _ in words[:agreed])
+                self._committed_bytes = min(len(self._pcm), self._committed_bytes +
+                                            int(words[agreed - 1][1] * SAMPLE_RATE) * 2)
+            self._hypothesis = words[agreed:]
+            return (self._committed_text + "".join(word for word, _ in self._hypothesis)).strip()
+
+    def _transcribe(self, pcm, prompt, **options):
+        if isinstance(self.model, ASRClient):
+            return self.model.transcribe(pcm, prompt.strip() or None, **options)
+        with self.lock:
+            return self.model.transcribe(pcm_to_float32(pcm), fp16=False,
+                                         initial_prompt=prompt.strip() or None,
+                                         condition_on_previous_text=False, **options)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Shared NeoMind ASR service
+One Whisper model for every kiosk/GUI on the box instead of a copy per
+process. Clients POST 16 kHz mono int16 PCM to /transcribe on localhost.
+Utterances that arrive together are micro-batched: the batcher waits up to
+--max-wait-ms after the first one for up to --max-batch more, then decodes
+them with a single batched encoder/decoder pass.
+
+    python gui/asr_service.py [--port 5100] [--max-batch 8] [--max-wait-ms 30]
+
+GUIs find the service at NEOMIND_ASR_URL and fall back to loading their own
+model when it isn't running.
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from asr import SAMPLE_RATE, pcm_to_float32
+
+MAX_BATCH_SECONDS = 30  # Whisper's window; longer audio is transcribed on its own
+
+
+class Job:
+    __slots__ = ('pcm', 'prompt', 'word_timestamps', 'future', 'queued_at')
+
+    def __init__(self, pcm, prompt=None, word_timestamps=False):
+        self.pcm = pcm
+        self.prompt = prompt
+        self.word_timestamps = word_timestamps
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+    @property
+    def batchable(self):
+        """Plain requests share a batched decode; prompts / word timestamps need transcribe()"""
+        return (not self.prompt and not self.word_timestamps
+                and len(self.pcm) / 2 / SAMPLE_RATE <= MAX_BATCH_SECONDS)
+
+
+class Batcher:
+    """Collect pending utterances into micro-batches for one Whisper model"""
+
+    def __init__(self, model, max_batch=8, max_wait_ms=30):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.stats = {'utterances': 0, 'batches': 0, 'largest_batch': 0, 'errors': 0}
+        threading.Thread(target=self._run, name='asr-batcher', daemon=True).start()
+
+    def submit(self, pcm, prompt=None, word_timestamps=False):
+        """Queue one utterance; returns a Future of the result dict"""
+        job = Job(pcm, prompt, word_timestamps)
+        self._queue.put(job)
+        return job.future
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        plain = [job for job in batch if job.batchable]
+        if plain:
+            try:
+                texts = self._decode_batch([job.pcm for job in plain])
+                for job, text in zip(plain, texts):
+                    self._done(job, {'text': text}, started, len(plain))
+            except Exception as e:
+                for job in plain:
+                    self._fail(job, e)
+        for job in batch:
+            if not job.batchable:
+                try:
+                    self._done(job, self._transcribe(job), started, 1)
+                except Exception as e:
+                    self._fail(job, e)
+        with self._lock:
+            self.stats['utterances'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+    def _decode_batch(self, pcms):
+        import torch
+        import whisper
+        n_mels = self.model.dims.n_mels
+        mels = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(pcm_to_float32(pcm)), n_mels)
+                            for pcm in pcms]).to(self.model.device)
+        options = whisper.DecodingOptions(language='en', fp16=False, without_timestamps=True)
+        return [result.text.strip() for result in whisper.decode(self.model, mels, options)]
+
+    def _transcribe(self, job):
+        result = self.model.transcribe(pcm_to_float32(job.pcm), fp16=False,
+                                       initial_prompt=job.prompt or None,
+                                       condition_on_previous_text=False,
+                                       word_timestamps=job.word_timestamps)
+        reply = {'text': result['text'].strip()}
+        if job.word_timestamps:
+            reply['segments'] = [{'words': [{'word': w['word'], 'end': w['end']}
+                                            for w in segment.get('words', ())]}
+                                 for segment in result['segments']]
+        return reply
+
+    def _done(self, job, reply, started, batch_size):
+        now = time.perf_counter()
+        reply.update(batch=batch_size, queue_ms=round((started - job.queued_at) * 1000, 1),
+                     asr_ms=round((now - started) * 1000, 1))
+        job.future.set_result(reply)
+
+    def _fail(self, job, error):
+        with self._lock:
+            self.stats['errors'] += 1
+        job.future.set_exception(error)
+
+
+def make_handler(batcher, model_name):
+    class ASRHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive for the GUIs' pooled sessions
+
+        def do_GET(self):
+            if urlparse(self.path).path != '/health':
+                return self._reply(404, {'error': 'not found'})
+            stats = batcher.snapshot()
+            self._reply(200, {'status': 'healthy', 'model': model_name,
+                              'max_batch': batcher.max_batch,
+                              'max_wait_ms': batcher.max_wait * 1000, **stats})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/transcribe':
+                return self._reply(404, {'error': 'not found'})
+            length = int(self.headers.get('Content-Length', 0))
+            pcm = self.rfile.read(length)
+            if not pcm or length % 2:
+                return self._reply(400, {'error': 'body must be 16 kHz mono int16 PCM'})
+            params = parse_qs(url.query)
+            future = batcher.submit(pcm, params.get('prompt', [None])[0],
+                                    params.get('word_timestamps', ['0'])[0] == '1')
+            try:
+                self._reply(200, future.result())
+            except Exception as e:
+                self._reply(500, {'error': str(e)})
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ASRHandler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Shared NeoMind ASR service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('NEOMIND_ASR_PORT', 5100)))
+    parser.add_argument('--model', default=os.environ.get('WHISPER_MODEL', 'tiny.en'))
+    parser.add_argument('--max-batch', type=int, default=int(os.environ.get('NEOMIND_ASR_MAX_BATCH', 8)),
+                        help='utterances decoded together')
+    parser.add_argument('--max-wait-ms', type=float,
+                        default=float(os.environ.get('NEOMIND_ASR_MAX_WAIT_MS', 30)),
+                        help='how long the first utterance waits for others to join its batch')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    import whisper
+    print(f"Loading Whisper {args.model}…")
+    model = whisper.load_model(args.model)
+    batcher = Batcher(model, args.max_batch, args.max_wait_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher, args.model))
+    server.daemon_threads = True
+    print(f"🎧 ASR service on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms:g} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
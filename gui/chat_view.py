@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Chat log for the NeoMind GUIs
+Messages and streamed chunks are queued and written to the Text widget once
+per frame, with one state toggle and at most one scroll, instead of once per
+message. Only the newest `max_turns` turns stay on screen. Older ones are
+trimmed from the top and paged back in from the server's /chat/history when
+the reader scrolls to the top, so an update costs the same after five
+minutes or five hours.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+
+FLUSH_MS = 33
+MAX_TURNS = 200
+PAGE_TURNS = 50
+
+
+class ChatView:
+    """Coalescing, bounded view over a tk.Text kept in the disabled state
+
+    load_older(before, limit), if given, runs via submit() on a worker thread
+    and returns (turns, has_more). turns is a list of (seq, speaker, message,
+    datetime), oldest first. seq is the turn's 1-based position in the
+    child's history on the server; `before` is the oldest one on screen, or
+    None for the newest page.
+    """
+
+    def __init__(self, text, load_older=None, submit=None, scrollbar=None,
+                 max_turns=MAX_TURNS, page=PAGE_TURNS):
+        self.text = text
+        self.load_older = load_older
+        self.submit = submit or (lambda fn: threading.Thread(target=fn, daemon=True).start())
+        self.scrollbar = scrollbar
+        self.max_turns = max_turns
+        self.page = page
+        self._turns = deque()     # [mark, seq, placed] per turn on screen, oldest first
+        self._pending = []        # (new turn or None, turn appended to, text) for the next flush
+        self._flush_job = None
+        self._next_mark = 0
+        self._trimmed_seq = None  # seq just after the newest server turn trimmed away
+        self._has_more = True
+        self._loading = False
+        text.config(yscrollcommand=self._on_scroll)
+        for event in ('<MouseWheel>', '<Button-4>'):
+            text.bind(event, lambda e: self._maybe_page(), add='+')
+
+    # ---------- Live messages (Tk thread) ----------
+    def add(self, speaker, message, end="\n\n", when=None):
+        """Start a new turn; returns its handle for confirm()"""
+        entry = [self._new_mark(), None, False]
+        self._turns.append(entry)
+        self._queue(entry, None, self._format(speaker, message, end, when))
+        return entry
+
+    def append(self, turn, text):
+        """Add text to the end of a turn, e.g. the next streamed chunk of a reply
+
+        Turns added since (the child's next message) stay after it.
+        """
+        self._queue(None, turn, text)
+
+    def confirm(self, count, message=None, reply=None):
+        """The server stored an exchange: number its turns from conversation_count
+
+        message and reply are the handles add() returned for the child's
+        message and Neo's reply. Other turns may have been added since, e.g.
+        the next message sent while this reply was on its way.
+        """
+        if not count:
+            return
+        if reply is not None:
+            reply[1] = count
+        if message is not None:
+            message[1] = count - 1
+
+    def clear(self):
+        self._pending.clear()
+        self._write(lambda: self.text.delete('1.0', 'end'))
+        for mark, *_ in self._turns:
+            self.text.mark_unset(mark)
+        self._turns.clear()
+        self._trimmed_seq, self._has_more = None, True
+
+    @staticmethod
+    def _format(speaker, message, end="\n\n", when=None):
+        return f"[{(when or datetime.now()):%H:%M}] {speaker}: {message}{end}"
+
+    def _new_mark(self):
+        self._next_mark += 1
+        return f"chat_turn{self._next_mark}"
+
+    def _queue(self, entry, turn, text):
+        self._pending.append((entry, turn, text))
+        if self._flush_job is None:
+            self._flush_job = self.text.after(FLUSH_MS, self._flush)
+
+    def _flush(self):
+        self._flush_job = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        at_bottom = self.text.yview()[1] >= 0.999
+
+        def insert():
+            for entry, turn, text in pending:
+                if entry:
+                    start = self.text.index('end-1c')
+                    self.text.insert('end', text)
+                    self.text.mark_set(entry[0], start)
+                    entry[2] = True
+                else:
+                    at = self._end_of(turn)
+                    if at:
+                        self.text.insert(at, text)
+            # Trim only while following the conversation; a reader scrolled
+            # up into history keeps what they paged in until they come back
+            if at_bottom:
+                self._trim()
+
+        self._write(insert)
+        if at_bottom:
+            self.text.see('end')
+
+    def _trim(self):
+        excess = len(self._turns) - self.max_turns
+        if excess <= 0:
+            return
+        removed = [self._turns.popleft() for _ in range(excess)]
+        self.text.delete('1.0', self._turns[0][0])
+        for mark, seq, _ in removed:
+            self.text.mark_unset(mark)
+            if seq is not None:
+                self._trimmed_seq = seq + 1
+                self._has_more = True
+
+    def _end_of(self, turn):
+        """Where text appended to a turn goes: the start of the next turn shown
+
+        Marks keep right gravity, so that turn's mark moves past the new
+        text. None if the turn has been trimmed or cleared.
+        """
+        following = None
+        for entry in reversed(self._turns):
+            if entry is turn:
+                return following[0] if following else 'end'
+            if entry[2]:
+                following = entry
+        return None
+
+    def _write(self, change):
+        self.text.config(state='normal')
+        try:
+            change()
+        finally:
+            self.text.config(state='disabled')
+
+    # ---------- Paging older turns ----------
+    def _on_scroll(self, first, last):
+        if self.scrollbar:
+            self.scrollbar.set(first, last)
+        if float(first) <= 0 and float(last) < 1:
+            self._maybe_page()
+
+    def _before(self):
+        # Overlapping exchanges can put seqs slightly out of screen order
+        return min((seq for _, seq, _ in self._turns if seq is not None), default=self._trimmed_seq)
+
+    def _maybe_page(self):
+        if self.load_older is None or self._loading or not self._has_more:
+            return
+        if self.text.yview()[0] > 0:
+            return
+        before = self._before()
+        if before is not None and before <= 1:
+            self._has_more = False
+            return
+        self._loading = True
+
+        def fetch():
+            try:
+                turns, has_more = self.load_older(before, self.page)
+            except Exception as e:
+                print(f"History error: {e}")
+                turns, has_more = [], True
+            self.text.after(0, lambda: self._prepend(before, turns, has_more))
+
+        self.submit(fetch)
+
+    def _prepend(self, before, turns, has_more):
+        self._loading = False
+        if before != self._before():
+            return  # the view changed while the page was loading
+        self._has_more = has_more
+        if not turns:
+            return
+        # Keep what the reader is looking at in place while text lands above it
+        self.text.mark_set('chat_anchor', '@0,0')
+
+        def insert():
+            for seq, speaker, message, when in reversed(turns):
+                mark = self._new_mark()
+                self.text.insert('1.0', self._format(speaker, message, when=when))
+                self.text.mark_set(mark, '1.0')
+                self._turns.appendleft([mark, seq, True])
+
+        self._write(insert)
+        self.text.yview('chat_anchor')
+        self.text.mark_unset('chat_anchor')
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+How each emotion looks in the NeoMind GUIs
+The server sends an emotion name with every response ('happy', 'excited',
+'confused'); the GUIs add their own states ('think', 'listen'). One dict
+lookup gives the label, the background colour and the eye shapes, so no GUI
+needs to scan text or chain startswith() / `in` checks.
+"""
+
+from collections import namedtuple
+
+# dy / grow are fractions of the eye size, so every GUI can scale them
+Eye = namedtuple('Eye', 'open dy grow')
+Style = namedtuple('Style', 'label colour eyes')
+
+OPEN = Eye(True, 0.0, 0.0)
+BIG = Eye(True, 0.0, 0.15)
+UP = Eye(True, -0.2, 0.0)
+SHUT = Eye(False, 0.0, 0.0)
+
+DEFAULT = 'happy'
+STYLES = {
+    'happy': Style("Happy :)", 'lightyellow', (OPEN, OPEN)),
+    'excited': Style("Excited :D", 'lightpink', (BIG, BIG)),
+    'think': Style("Think…", 'lightcyan', (UP, UP)),
+    'listen': Style("Listen |", 'lightblue', (OPEN, OPEN)),
+    'confused': Style("Confused ?", 'wheat', (OPEN, SHUT)),
+}
+
+
+def style(emotion):
+    """Style for an emotion name; unknown names (e.g. from a newer server) look happy"""
+    return STYLES.get(emotion) or STYLES[DEFAULT]
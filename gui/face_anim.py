@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Tweened face animation for the NeoMind GUIs
+The animator owns all face state and only ever runs on the Tk thread. Other
+threads call set(), which just queues the change. A fixed-timestep loop
+drains the queue, advances the simulation (tweens, blinks, the talking
+mouth) in steps of 1/fps and draws at most one frame per tick. A late tick
+catches up by a few steps and skips the frames in between, so under load the
+face gets choppier rather than slower. While nothing moves, the loop only
+polls the queue every IDLE_MS.
+
+Every feature (eye, mouth) is one rounded shape described by a bbox, so any
+pose can blend into any other: a closed eye is just a very flat open one.
+"""
+
+import queue
+import random
+import time
+
+FPS = 30
+IDLE_MS = 50             # queue/timer poll while the face is still
+MAX_CATCH_UP = 4         # simulation steps per tick before the backlog is dropped
+EMOTION_MS = 180         # tween lengths
+BLINK_MS = 50
+MOUTH_MS = 70
+BLINK_HOLD_MS = 120
+BLINK_MIN_MS, BLINK_MAX_MS = 3000, 6000
+MOUTH_PERIOD_MS = 160
+
+
+def ease(t):
+    return t * t * (3 - 2 * t)
+
+
+def lerp_box(a, b, t):
+    return tuple(x + (y - x) * t for x, y in zip(a, b))
+
+
+def pill(box):
+    """Points of a smoothed polygon filling `box` with fully rounded ends
+
+    Square boxes come out as circles, flat ones as a bar with round ends.
+    Straight edges are made of doubled points so smoothing keeps them straight.
+    """
+    x0, y0, x1, y1 = box
+    r = min(x1 - x0, y1 - y0) / 2
+    return (x0 + r, y0, x0 + r, y0, x1 - r, y0, x1 - r, y0, x1, y0,
+            x1, y0 + r, x1, y0 + r, x1, y1 - r, x1, y1 - r, x1, y1,
+            x1 - r, y1, x1 - r, y1, x0 + r, y1, x0 + r, y1, x0, y1,
+            x0, y1 - r, x0, y1 - r, x0, y0 + r, x0, y0 + r, x0, y0)
+
+
+class FaceAnimator:
+    """Fixed-timestep face animation on a Tk canvas
+
+    pose(state) maps the state dict to {feature: bbox}. Besides whatever the
+    GUI passes to set(), the state holds 'emotion', 'talking' and the two
+    keys the animator drives itself, 'blink' and 'mouth_open'.
+    can_blink(state) gates the random blink. on_state(state) runs on the Tk
+    thread after each batch of changes, e.g. to update a caption.
+    """
+
+    def __init__(self, canvas, pose, fill, fps=FPS, can_blink=None, on_state=None, **state):
+        self.canvas = canvas
+        self.pose = pose
+        self.dt = 1 / fps
+        self.can_blink = can_blink or (lambda state: True)
+        self.on_state = on_state
+        self.state = {'emotion': 'happy', 'talking': False, 'blink': False, 'mouth_open': False,
+                      **state}
+        self._changes = queue.SimpleQueue()
+        self._clock = 0.0        # simulation time, seconds
+        self._next_blink = self._blink_delay()
+        self._blink_until = None
+        self._next_mouth = 0.0
+        self._from = self._to = self._shown = pose(self.state)
+        self._t, self._tween = 1.0, EMOTION_MS / 1000
+        self._items = {name: canvas.create_polygon(pill(box), smooth=True, fill=fill, outline=fill)
+                       for name, box in self._shown.items()}
+        self.frames, self.dropped, self.frame_time, self.frame_max = 0, 0, 0.0, 0.0
+        self._moving = False
+        self._last = time.perf_counter()
+        self._acc = 0.0
+        canvas.after(IDLE_MS, self._tick)
+        if on_state:
+            on_state(self.state)
+
+    # ---------- API (any thread) ----------
+    def set(self, **changes):
+        """Queue a state change; it is applied on the next tick"""
+        self._changes.put(changes)
+
+    # ---------- Loop (Tk thread) ----------
+    def _tick(self):
+        now = time.perf_counter()
+        elapsed, self._last = now - self._last, now
+        if self._moving:
+            self._acc += elapsed
+        else:
+            # Only timers to keep while still; the first frame of a new tween is due at once
+            self._clock += elapsed
+            self._acc = self.dt
+            self._timers()
+        self._drain()
+        steps = 0
+        while self._acc >= self.dt and self._is_moving():
+            if steps == MAX_CATCH_UP:
+                self.dropped += int(self._acc / self.dt)
+                self._acc = 0.0
+                break
+            self._step()
+            self._acc -= self.dt
+            steps += 1
+        if steps:
+            self.dropped += steps - 1
+            self._render()
+        self._moving = self._is_moving()
+        if self._moving:
+            delay = self.dt - (time.perf_counter() - now)
+            self.canvas.after(max(1, int(delay * 1000)), self._tick)
+        else:
+            self.canvas.after(IDLE_MS, self._tick)
+
+    def _drain(self):
+        changes = {}
+        try:
+            while True:
+                changes.update(self._changes.get_nowait())
+        except queue.Empty:
+            pass
+        if not changes:
+            return
+        if 'talking' in changes and changes['talking'] != self.state['talking']:
+            changes['mouth_open'] = changes['talking']
+            self._next_mouth = self._clock + MOUTH_PERIOD_MS / 1000
+        self._update(changes)
+        if self.on_state:
+            self.on_state(self.state)
+
+    def _step(self):
+        self._clock += self.dt
+        self._timers()
+        if self._t < 1:
+            self._t = min(1.0, self._t + self.dt / self._tween)
+
+    def _timers(self):
+        if self._blink_until is not None:
+            if self._clock >= self._blink_until:
+                self._blink_until = None
+                self._update({'blink': False})
+        elif self._clock >= self._next_blink:
+            self._next_blink = self._clock + self._blink_delay()
+            if self.can_blink(self.state):
+                self._blink_until = self._clock + BLINK_HOLD_MS / 1000
+                self._update({'blink': True})
+        if self.state['talking'] and self._clock >= self._next_mouth:
+            self._next_mouth = self._clock + MOUTH_PERIOD_MS / 1000
+            self._update({'mouth_open': not self.state['mouth_open']})
+
+    def _update(self, changes):
+        """Apply changes and tween from wherever the face is now to the new pose"""
+        self.state.update(changes)
+        target = self.pose(self.state)
+        if target == self._to:
+            return
+        self._from, self._to, self._t = self._current(), target, 0.0
+        if 'blink' in changes:
+            self._tween = BLINK_MS / 1000
+        elif 'mouth_open' in changes and 'emotion' not in changes:
+            self._tween = MOUTH_MS / 1000
+        else:
+            self._tween = EMOTION_MS / 1000
+
+    def _is_moving(self):
+        return self._t < 1 or self.state['talking'] or self._blink_until is not None
+
+    def _current(self):
+        t = ease(self._t)
+        return {name: lerp_box(self._from[name], box, t) for name, box in self._to.items()}
+
+    def _render(self):
+        started = time.perf_counter()
+        current = self._current()
+        for name, box in current.items():
+            if box != self._shown[name]:
+                self.canvas.coords(self._items[name], *pill(box))
+        self._shown = current
+        spent = time.perf_counter() - started
+        self.frames += 1
+        self.frame_time += spent
+        self.frame_max = max(self.frame_max, spent)
+
+    @staticmethod
+    def _blink_delay():
+        return random.randint(BLINK_MIN_MS, BLINK_MAX_MS) / 1000
+
+    def frame_stats(self):
+        """Frames drawn and dropped, mean/max draw time since the last call"""
+        n = self.frames
+        stats = (f"{n} frames ({self.dropped} dropped), "
+                 f"{self.frame_time / n * 1000 if n else 0:.2f}/{self.frame_max * 1000:.2f} ms avg/max")
+        self.frames, self.dropped, self.frame_time, self.frame_max = 0, 0, 0.0, 0.0
+        return stats
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Callback-driven mic capture for the NeoMind kiosk
+PortAudio's callback copies each buffer into a preallocated int16 ring and
+advances a sample counter; it never allocates audio buffers or blocks. There
+is a single writer (the callback) and a single reader (the mic loop), so the
+counter is the only shared state and no lock is needed. A reader that falls
+behind (e.g. while Whisper hogs the CPU) loses nothing until it is a whole
+ring behind, and every lost sample is counted.
+"""
+
+import time
+
+import numpy as np
+
+PA_CONTINUE = 0          # pyaudio.paContinue
+PA_INPUT_OVERFLOW = 0x2  # pyaudio.paInputOverflow
+
+
+class MicRing:
+    """Preallocated int16 ring buffer fed by a PyAudio input callback"""
+
+    def __init__(self, rate=16000, seconds=20):
+        self.rate = rate
+        self.capacity = rate * seconds
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0        # total samples written; only the callback advances it
+        self.callbacks = 0
+        self.overflows = 0      # buffers PortAudio flagged as overflowed (audio lost in the driver)
+        self.dropped = 0        # samples the reader lost by falling a whole ring behind
+
+    def open(self, pa, frames_per_buffer, input_device_index=None):
+        """Open a callback input stream on a pyaudio.PyAudio instance"""
+        import pyaudio
+        return pa.open(format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+                       input_device_index=input_device_index,
+                       frames_per_buffer=frames_per_buffer, stream_callback=self._callback)
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        self.callbacks += 1
+        if status & PA_INPUT_OVERFLOW:
+            self.overflows += 1
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        n = len(samples)
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        if first < n:
+            self._buffer[:n - first] = samples[first:]
+        self.written += n
+        return None, PA_CONTINUE
+
+    def wait(self, position, samples, timeout=1.0):
+        """Block until `samples` past `position` are available
+
+        Returns the position to read from: normally `position`, later if the
+        reader had fallen a whole ring behind, or None on timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            available = self.written - position
+            if available > self.capacity - samples:
+                skipped = available - samples
+                self.dropped += skipped
+                position += skipped
+                available = samples
+            if available >= samples:
+                return position
+            if time.perf_counter() > deadline:
+                return None
+            # Sleep for the audio still missing rather than spinning
+            time.sleep((samples - available) / self.rate)
+
+    def view(self, start, end):
+        """int16 samples [start, end) without copying (copies only across the wrap)"""
+        if end - start > self.capacity or start < self.written - self.capacity:
+            raise IndexError("samples already overwritten")
+        i, j = start % self.capacity, end % self.capacity
+        if i < j or start == end:
+            return self._buffer[i:j]
+        return np.concatenate((self._buffer[i:], self._buffer[:j]))
+
+    def read(self, start, end):
+        """PCM bytes for [start, end), e.g. to hand an utterance to ASR"""
+        return self.view(start, end).tobytes()
+
+    def stats(self):
+        return {'seconds': round(self.written / self.rate, 1), 'callbacks': self.callbacks,
+                'overflows': self.overflows, 'dropped_samples': self.dropped}
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+NeoMind HTTP client shared by the GUIs
+One pooled keep-alive session per app instead of a fresh connection (and TCP
+/ TLS handshake) per message. Connection failures are retried with backoff;
+HTTP/2 is used when NEOMIND_HTTP2=1 and httpx[http2] is installed.
+"""
+
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    has_httpx = True
+except ImportError:
+    has_httpx = False
+
+
+class ServerUnavailable(Exception):
+    """The server could not be reached"""
+
+
+class ServerError(Exception):
+    """The server answered with an error status"""
+
+    def __init__(self, status_code, message=None):
+        super().__init__(message or f"Server error: {status_code}")
+        self.status_code = status_code
+
+
+def iter_sse(lines):
+    """Yield (event, data) pairs from text/event-stream lines as they arrive"""
+    event, data = 'message', []
+    for raw in lines:
+        line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = 'message', []
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip())
+
+
+class NeoMindClient:
+    """Pooled client for the NeoMind server endpoints"""
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=3.05, read_timeout=10,
+                 retries=2, backoff=0.3, http2=None):
+        self.base_url = (base_url or os.environ.get('NEOMIND_SERVER', 'http://localhost:5000')).rstrip('/')
+        self.pool_size = pool_size or int(os.environ.get('NEOMIND_HTTP_POOL', 4))
+        self.timeout = (connect_timeout, read_timeout)
+        if http2 is None:
+            http2 = os.environ.get('NEOMIND_HTTP2', '0') == '1'
+        self.http2 = http2 and has_httpx
+
+        if self.http2:
+            try:
+                self._client = httpx.Client(
+                    http2=True,
+                    transport=httpx.HTTPTransport(http2=True, retries=retries),
+                    limits=httpx.Limits(max_connections=self.pool_size,
+                                        max_keepalive_connections=self.pool_size),
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+                )
+            except (ImportError, RuntimeError) as e:
+                # httpx without the h2 package refuses http2=True
+                print(f"⚠️ HTTP/2 not available, using HTTP/1.1: {e}")
+                self.http2 = False
+        if not self.http2:
+            # Connect failures are always safe to retry; status retries only for GET,
+            # so a chat turn is never stored twice
+            retry = Retry(total=retries, connect=retries, read=0, status=retries,
+                          status_forcelist=(502, 503, 504), allowed_methods=frozenset({'GET'}),
+                          backoff_factor=backoff, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                  max_retries=retry)
+            self._session = requests.Session()
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+
+    # ---------- Transport ----------
+    def _request(self, method, path, timeout=None, **kwargs):
+        url = f"{self.base_url}{path}"
+        try:
+            if self.http2:
+                return self._client.request(method, url, timeout=timeout or httpx.USE_CLIENT_DEFAULT,
+                                            **kwargs)
+            return self._session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+        except requests.exceptions.ConnectionError as e:
+            raise ServerUnavailable(str(e)) from e
+        except Exception as e:
+            if has_httpx and isinstance(e, httpx.TransportError):
+                raise ServerUnavailable(str(e)) from e
+            raise
+
+    def _json(self, response):
+        if response.status_code != 200:
+            raise ServerError(response.status_code)
+        return response.json()
+
+    # ---------- Endpoints ----------
+    def health(self, timeout=None):
+        return self._json(self._request('GET', '/health', timeout=timeout))
+
+    def chat(self, message, child_name, timeout=None):
+        """POST /chat/text and return its JSON payload"""
+        return self._json(self._request('POST', '/chat/text', timeout=timeout,
+                                        json={'message': message, 'child_name': child_name}))
+
+    def chat_stream(self, message, child_name, timeout=None):
+        """Yield (event, data) from /chat/stream: 'chunk'... then 'done'
+
+        Servers without /chat/stream get a single 'done' event from /chat/text.
+        """
+        payload = {'message': message, 'child_name': child_name}
+        if self.http2:
+            try:
+                with self._client.stream('POST', f"{self.base_url}/chat/stream", json=payload,
+                                         timeout=timeout or httpx.USE_CLIENT_DEFAULT) as response:
+                    if response.status_code == 200:
+                        yield from iter_sse(response.iter_lines())
+                        return
+                    status = response.status_code
+            except httpx.TransportError as e:
+                raise ServerUnavailable(str(e)) from e
+        else:
+            response = self._request('POST', '/chat/stream', timeout=timeout, json=payload,
+                                     stream=True)
+            with response:
+                if response.status_code == 200:
+                    yield from iter_sse(response.iter_lines(chunk_size=None))
+                    return
+                status = response.status_code
+
+        if status != 404:
+            raise ServerError(status)
+        yield 'done', self.chat(message, child_name, timeout)
+
+    def history(self, child_name, before=None, limit=50, timeout=None):
+        """GET /chat/history: up to `limit` turns before seq `before` (newest if None)"""
+        params = {'child_name': child_name, 'limit': limit}
+        if before is not None:
+            params['before'] = before
+        return self._json(self._request('GET', '/chat/history', timeout=timeout, params=params))
+
+    def close(self):
+        if self.http2:
+            self._client.close()
+        else:
+            self._session.close()
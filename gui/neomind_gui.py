@@ -6,82 +6,123 @@ Avoids all font rendering issues
 
 import os
 import sys
+import time
 import warnings
 import threading
 from datetime import datetime
 
+from startup import StartupProfile
+
+profile = StartupProfile()
+
 # Suppress everything
 warnings.filterwarnings("ignore")
 os.environ['ALSA_SUPPRESS_ERRORS'] = '1'
 os.environ['PYTHONWARNINGS'] = 'ignore'
 
-# Minimal imports
-import tkinter as tk
-from tkinter import messagebox
-import requests
+# Minimal imports - audio, Whisper and TTS load after the window is up
+with profile.step("import tkinter + client"):
+    import tkinter as tk
+    from tkinter import messagebox
+    
+    from chat_view import ChatView
+    from emotion_styles import DEFAULT, STYLES, style
+    from neomind_client import NeoMindClient, ServerError, ServerUnavailable
+    from scheduler import TurnScheduler
 
 print("🧠 NeoMind Ultra Minimal - Starting...")
 
-# Check what's available
+# Filled in by load_optional_modules()
+pyaudio = whisper = pyttsx3 = None
 has_audio = False
 has_whisper = False
 has_tts = False
 
-try:
-    import pyaudio
-    import webrtcvad
-    has_audio = True
-    print("✅ Audio available")
-except:
-    print("⚠️ Audio not available")
-
-try:
-    import whisper
-    has_whisper = True
-    print("✅ Whisper available") 
-except:
-    print("⚠️ Whisper not available")
-
-try:
-    import pyttsx3
-    has_tts = True
-    print("✅ TTS available")
-except:
-    print("⚠️ TTS not available")
+def load_optional_modules(with_whisper=True):
+    """Import the heavy optional stacks (torch via whisper); runs off the Tk thread"""
+    global pyaudio, whisper, pyttsx3, has_audio, has_whisper, has_tts
+    
+    try:
+        with profile.step("import pyaudio + webrtcvad"):
+            import pyaudio
+            import webrtcvad
+        has_audio = True
+        print("✅ Audio available")
+    except:
+        print("⚠️ Audio not available")
+    
+    if with_whisper:
+        try:
+            with profile.step("import whisper (torch)"):
+                import whisper
+            has_whisper = True
+            print("✅ Whisper available")
+        except:
+            print("⚠️ Whisper not available")
+    
+    try:
+        with profile.step("import pyttsx3"):
+            import pyttsx3
+        has_tts = True
+        print("✅ TTS available")
+    except:
+        print("⚠️ TTS not available")
 
 class UltraMinimalNeoMind:
     """Ultra minimal version that definitely works"""
     
     def __init__(self):
         self.child_name = "friend"
-        self.server_url = "http://localhost:5000"
-        self.current_emotion = "happy"
+        self.chat_child = self.child_name  # whose history the chat view pages in
+        self.client = NeoMindClient()
+        self.server_url = self.client.base_url
+        self.current_emotion = DEFAULT
         self.is_listening = False
         
         # Initialize components
         self.whisper_model = None
         self.tts_engine = None
+        self.speech = None  # SpeechPipeline once TTS is loaded
         self.audio = None
         
-        self.init_components()
-        self.create_gui()
+        with profile.step("create window"):
+            self.create_gui()
+        
+        # Bounded network / ASR / TTS workers, results applied in turn order
+        self.scheduler = TurnScheduler(self.root)
+        self.latest_turn = None   # only this turn's reply may speak
+        
+        # Paint first, then load ASR/TTS/audio in the background
+        self.root.after_idle(lambda: profile.mark("window painted"))
+        threading.Thread(target=self.init_components, name="neomind-loader", daemon=True).start()
     
     def init_components(self):
-        """Initialize components safely"""
+        """Initialize components safely (background thread)"""
+        # A running ASR service saves this process its own copy of Whisper
+        from asr import connect_asr_service
+        with profile.step("look for ASR service"):
+            whisper_model = connect_asr_service()
+        if whisper_model:
+            print("✅ Using shared ASR service")
+        load_optional_modules(with_whisper=whisper_model is None)
+        
         # Whisper
         if has_whisper:
             try:
                 print("Loading Whisper...")
-                self.whisper_model = whisper.load_model("tiny.en")
+                with profile.step("load Whisper model"):
+                    whisper_model = whisper.load_model("tiny.en")
                 print("Whisper loaded")
             except Exception as e:
+                whisper_model = None
                 print(f"Whisper failed: {e}")
         
         # TTS
         if has_tts:
             try:
-                self.tts_engine = pyttsx3.init()
-                self.tts_engine.setProperty('rate', 150)
+                with profile.step("init pyttsx3"):
+                    self.tts_engine = pyttsx3.init()
+                    self.tts_engine.setProperty('rate', 150)
             except Exception as e:
                 print(f"TTS failed: {e}")
         
@@ -90,11 +131,29 @@ class UltraMinimalNeoMind:
             try:
                 # Suppress ALSA during init
                 import contextlib
-                with open(os.devnull, 'w') as devnull:
-                    with contextlib.redirect_stderr(devnull):
-                        self.audio = pyaudio.PyAudio()
+                with profile.step("init PyAudio"):
+                    with open(os.devnull, 'w') as devnull:
+                        with contextlib.redirect_stderr(devnull):
+                            self.audio = pyaudio.PyAudio()
             except Exception as e:
                 print(f"Audio failed: {e}")
+        
+        # Sentences are rendered ahead while the previous one plays
+        if self.tts_engine:
+            from tts import SpeechPipeline
+            self.speech = SpeechPipeline(self.tts_engine, self.audio)
+        
+        self.whisper_model = whisper_model
+        self.root.after(0, self.on_components_ready)
+    
+    def on_components_ready(self):
+        """Enable voice input once ASR and audio are loaded"""
+        profile.mark("components ready")
+        if self.audio and self.whisper_model:
+            self.listen_btn.config(text="Listen", state='normal')
+        else:
+            self.listen_btn.config(text="No voice", state='disabled')
+        profile.report()
     
     def create_gui(self):
         """Create ultra-simple GUI"""
@@ -165,16 +224,16 @@ class UltraMinimalNeoMind:
         buttons = tk.Frame(main, bg='lightgray')
         buttons.pack(fill='x', pady=5)
         
-        # Audio button (if available)
-        if self.audio and self.whisper_model:
-            self.listen_btn = tk.Button(
-                buttons,
-                text="Listen",
-                command=self.toggle_listening,
-                bg='lightblue',
-                relief='raised'
-            )
-            self.listen_btn.pack(side='left', padx=2)
+        # Audio button - enabled once Whisper and audio have loaded
+        self.listen_btn = tk.Button(
+            buttons,
+            text="Loading...",
+            command=self.toggle_listening,
+            bg='lightblue',
+            relief='raised',
+            state='disabled'
+        )
+        self.listen_btn.pack(side='left', padx=2)
         
         # Server test button
         tk.Button(
@@ -186,20 +245,12 @@ class UltraMinimalNeoMind:
         ).pack(side='left', padx=2)
         
         # Emotion buttons - simple text only
-        emotions = [
-            ("Happy :)", "lightyellow"),
-            ("Excited :D", "lightpink"), 
-            ("Think...", "lightcyan"),
-            ("Listen |", "lightblue"),
-            ("Confused ?", "wheat")
-        ]
-        
-        for emotion, color in emotions:
+        for emotion, emotion_style in STYLES.items():
             tk.Button(
                 buttons,
-                text=emotion,
+                text=emotion_style.label,
                 command=lambda e=emotion: self.set_emotion(e),
-                bg=color,
+                bg=emotion_style.colour,
                 relief='raised'
             ).pack(side='left', padx=1)
         
@@ -221,6 +272,9 @@ class UltraMinimalNeoMind:
             bd=2
         )
         self.chat_text.pack(fill='both', expand=True, pady=2)
+        # Coalesced, bounded log; older turns are paged in from the server
+        self.chat = ChatView(self.chat_text, load_older=self.load_history,
+                             submit=lambda fn: self.scheduler.submit('network', fn))
         
         # Input area
         input_frame = tk.Frame(chat_frame, bg='lightgray')
@@ -251,27 +305,13 @@ class UltraMinimalNeoMind:
             fg='gray'
         ).pack(pady=2)
     
-    def set_emotion(self, emotion_text):
-        """Set emotion display"""
+    def set_emotion(self, emotion):
+        """Set emotion display from an emotion name (see emotion_styles.STYLES)"""
         try:
-            self.emotion_display.config(text=f"Neo is {emotion_text}")
-            
-            # Change background color based on emotion
-            if "Happy" in emotion_text:
-                color = 'lightyellow'
-            elif "Excited" in emotion_text:
-                color = 'lightpink'
-            elif "Think" in emotion_text:
-                color = 'lightcyan'
-            elif "Listen" in emotion_text:
-                color = 'lightblue'
-            elif "Confused" in emotion_text:
-                color = 'wheat'
-            else:
-                color = 'lightgray'
-            
-            self.emotion_display.config(bg=color)
-            self.emotion_frame.config(bg=color)
+            self.current_emotion = emotion
+            emotion_style = style(emotion)
+            self.emotion_display.config(text=f"Neo is {emotion_style.label}", bg=emotion_style.colour)
+            self.emotion_frame.config(bg=emotion_style.colour)
             
         except Exception as e:
             print(f"Emotion error: {e}")
@@ -280,25 +320,36 @@ class UltraMinimalNeoMind:
         """Update status text"""
         try:
             self.status_var.set(text)
-            self.root.update_idletasks()
         except Exception as e:
             print(f"Status error: {e}")
     
-    def add_to_chat(self, speaker, message):
-        """Add message to chat"""
+    def add_to_chat(self, speaker, message, end="\n\n"):
+        """Add message to chat (written on the next frame)"""
         try:
-            self.chat_text.config(state='normal')
-            
-            timestamp = datetime.now().strftime("%H:%M")
-            full_message = f"[{timestamp}] {speaker}: {message}\n\n"
-            
-            self.chat_text.insert('end', full_message)
-            self.chat_text.config(state='disabled')
-            self.chat_text.see('end')
-            
+            if speaker != "Neo" and speaker != self.chat_child:
+                # Another child: start their log, paged from their own history
+                self.chat.clear()
+                self.chat_child = speaker
+            return self.chat.add(speaker, message, end)
         except Exception as e:
             print(f"Chat error: {e}")
     
+    def append_to_chat(self, turn, text):
+        """Append raw text to a chat turn, e.g. the next streamed chunk of a reply"""
+        try:
+            self.chat.append(turn, text)
+        except Exception as e:
+            print(f"Chat error: {e}")
+    
+    def load_history(self, before, limit):
+        """Older turns for the chat view; runs on the network lane"""
+        child_name = self.chat_child
+        data = self.client.history(child_name, before, limit)
+        turns = [(turn['seq'], child_name if turn['type'] == 'user' else "Neo", turn['message'],
+                  datetime.fromisoformat(turn['timestamp']))
+                 for turn in data['turns']]
+        return turns, data['has_more']
+    
     def send_message(self):
         """Send message to Neo"""
         message = self.message_var.get().strip()
@@ -308,62 +359,112 @@ class UltraMinimalNeoMind:
         self.message_var.set("")
         child_name = self.name_var.get() or "friend"
         
-        self.add_to_chat(child_name, message)
-        self.process_message(message, child_name)
+        self.start_turn(message, child_name)
+    
+    def start_turn(self, message, child_name):
+        """Show the child's message and ask Neo"""
+        self.process_message(message, child_name, self.add_to_chat(child_name, message))
     
-    def process_message(self, message, child_name):
-        """Process message with Neo"""
+    def process_message(self, message, child_name, message_turn=None):
+        """Process message with Neo; message_turn is the chat handle of the message"""
+        self.stop_speaking()
         self.update_status("Thinking...")
-        self.set_emotion("Think...")
+        self.set_emotion("think")
+        sent_at = time.perf_counter()
+        turn = self.latest_turn = self.scheduler.new_turn()
+        reply_turn = []   # chat handle of the streamed reply, set on the Tk thread
         
         def background():
+            chunks = []
+            posted = 0        # chunks shown (and spoken) one by one
+            count = None
+            emotion = DEFAULT
+            neo_response = None
+            error = None
             try:
-                # Try to contact server
-                response = requests.post(
-                    f"{self.server_url}/chat/text",
-                    json={'message': message, 'child_name': child_name},
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    neo_response = response.json().get('response', 'I got your message!')
-                else:
-                    neo_response = f"Server error: {response.status_code}"
+                # Stream the reply so the first sentence is shown and spoken early
+                for event, data in self.client.chat_stream(message, child_name):
+                    if event == 'chunk':
+                        chunks.append(data['text'])
+                        # Once a newer message barges in, the rest is shown silently at the end
+                        if turn == self.latest_turn and posted == len(chunks) - 1:
+                            posted += 1
+                            self.scheduler.post(turn, lambda t=data['text'], first=posted == 1:
+                                                self.handle_chunk(t, first, sent_at, reply_turn, turn))
+                    elif event == 'done':
+                        neo_response = data.get('response')
+                        count = data.get('conversation_count')
+                        emotion = data.get('emotion', DEFAULT)  # classified by the server
+                    elif event == 'error':
+                        error = f"Server error: {data.get('error')}"
+                neo_response = neo_response or ' '.join(chunks) or 'I got your message!'
                     
-            except requests.exceptions.ConnectionError:
-                neo_response = "I can't connect to my knowledge server, but I'm here to chat with you!"
+            except ServerError as e:
+                error = str(e)
+            except ServerUnavailable:
+                error = "I can't connect to my knowledge server, but I'm here to chat with you!"
             except Exception as e:
-                neo_response = f"Connection problem: {str(e)[:50]}"
-            
-            # Determine emotion
-            if any(word in neo_response.lower() for word in ['great', 'awesome', 'amazing']):
-                emotion = "Excited :D"
-            elif any(word in neo_response.lower() for word in ['confused', 'sorry', 'not sure']):
-                emotion = "Confused ?"
-            else:
-                emotion = "Happy :)"
+                error = f"Connection problem: {str(e)[:50]}"
             
             # Update GUI
-            self.root.after(0, lambda: self.handle_response(neo_response, emotion))
+            if posted:
+                rest = ' '.join(chunks[posted:])
+                self.scheduler.finish(turn, lambda: self.finish_stream(
+                    emotion, count, error, message_turn, reply_turn[0] if reply_turn else None, rest))
+            else:
+                self.scheduler.finish(turn, lambda: self.handle_response(
+                    error or neo_response, emotion, sent_at, count, message_turn, turn))
         
-        threading.Thread(target=background, daemon=True).start()
+        # A newer message supersedes older ones still waiting for a worker
+        self.scheduler.submit('network', background, turn=turn, supersede=True)
+    
+    def handle_chunk(self, text, first, sent_at, reply_turn, turn=None):
+        """Show one streamed chunk of Neo's response; speak it unless a newer turn started"""
+        if first:
+            reply_turn.append(self.add_to_chat("Neo", text, end=""))
+            self.update_status("Speaking...")
+        else:
+            self.append_to_chat(reply_turn[0], f" {text}")
+        if turn == self.latest_turn:
+            self.speak(text, sent_at if first else None)
     
-    def handle_response(self, response, emotion):
-        """Handle Neo's response"""
-        self.add_to_chat("Neo", response)
+    def finish_stream(self, emotion, count=None, error=None, message_turn=None, reply_turn=None,
+                      rest=""):
+        """Close the streamed response in the chat; error means it broke off part way
+
+        rest is the text that arrived after a newer message cut this reply off.
+        """
+        if rest:
+            self.append_to_chat(reply_turn, f" {rest}")
+        if error:
+            # Don't leave half an answer looking complete; the turn stays unnumbered
+            self.append_to_chat(reply_turn, f" … [reply interrupted: {error}]\n\n")
+            self.set_emotion("confused")
+            self.update_status("Reply interrupted")
+            return
+        self.append_to_chat(reply_turn, "\n\n")
+        self.chat.confirm(count, message_turn, reply_turn)
         self.set_emotion(emotion)
         self.update_status("Ready")
-        
-        # Speak if available
-        if self.tts_engine:
-            def speak():
-                try:
-                    self.tts_engine.say(response)
-                    self.tts_engine.runAndWait()
-                except Exception as e:
-                    print(f"Speech error: {e}")
-            
-            threading.Thread(target=speak, daemon=True).start()
+    
+    def handle_response(self, response, emotion, sent_at=None, count=None, message_turn=None,
+                        turn=None):
+        """Handle Neo's response; count is the server's conversation_count"""
+        self.chat.confirm(count, message_turn, self.add_to_chat("Neo", response))
+        self.set_emotion(emotion)
+        self.update_status("Ready")
+        if turn is None or turn == self.latest_turn:
+            self.speak(response, sent_at)
+    
+    def speak(self, text, sent_at=None):
+        """Queue text on the speech pipeline; sent_at starts the time-to-first-audio clock"""
+        if self.speech:
+            self.speech.say(text, sent_at)
+    
+    def stop_speaking(self):
+        """Barge-in: a new message or Listen cuts off the previous reply"""
+        if self.speech:
+            self.speech.cancel()
     
     def toggle_listening(self):
         """Toggle voice listening"""
@@ -378,53 +479,44 @@ class UltraMinimalNeoMind:
     
     def start_listening(self):
         """Start voice listening"""
+        self.stop_speaking()
         self.is_listening = True
         self.listen_btn.config(text="Stop", bg='lightcoral')
         self.update_status("Listening...")
-        self.set_emotion("Listen |")
+        self.set_emotion("listen")
         
         def listen():
+            from asr import Endpointer, capture_utterance, transcribe_pcm
+            
             try:
-                # Record audio
+                # Record until the child stops talking
+                endpointer = Endpointer()
                 stream = self.audio.open(
                     format=pyaudio.paInt16,
                     channels=1,
                     rate=16000,
                     input=True,
-                    frames_per_buffer=1024
+                    frames_per_buffer=endpointer.frame_samples
                 )
                 
-                frames = []
-                for _ in range(int(16000 * 3 / 1024)):  # 3 seconds
-                    if not self.is_listening:
-                        break
-                    data = stream.read(1024, exception_on_overflow=False)
-                    frames.append(data)
+                utterance = capture_utterance(stream, endpointer, lambda: self.is_listening)
                 
                 stream.stop_stream()
                 stream.close()
                 
-                if frames and self.is_listening:
-                    # Save and transcribe
-                    import tempfile
-                    import wave
-                    
-                    temp_file = tempfile.mktemp(suffix='.wav')
-                    with wave.open(temp_file, 'wb') as wf:
-                        wf.setnchannels(1)
-                        wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
-                        wf.setframerate(16000)
-                        wf.writeframes(b''.join(frames))
-                    
+                if utterance and self.is_listening:
+                    # Transcribe straight from memory
                     self.root.after(0, lambda: self.update_status("Processing..."))
                     
-                    result = self.whisper_model.transcribe(temp_file)
-                    text = result["text"].strip()
+                    started = time.perf_counter()
+                    text = transcribe_pcm(self.whisper_model, utterance.pcm)
+                    done = time.perf_counter()
+                    print(f"⏱️ End of speech → text {(done - utterance.speech_ended) * 1000:.0f} ms "
+                          f"(ASR {(done - started) * 1000:.0f} ms)")
                     
                     if text and self.is_listening:
                         child_name = self.name_var.get() or "friend"
-                        self.root.after(0, lambda: self.add_to_chat(child_name, text))
-                        self.root.after(0, lambda: self.process_message(text, child_name))
+                        self.root.after(0, lambda: self.start_turn(text, child_name))
                 
                 self.root.after(0, self.stop_listening)
                 
@@ -432,7 +524,7 @@ class UltraMinimalNeoMind:
                 print(f"Listening error: {e}")
                 self.root.after(0, self.stop_listening)
         
-        threading.Thread(target=listen, daemon=True).start()
+        self.scheduler.submit('asr', listen)
     
     def stop_listening(self):
         """Stop listening"""
@@ -440,30 +532,29 @@ class UltraMinimalNeoMind:
         if hasattr(self, 'listen_btn'):
             self.listen_btn.config(text="Listen", bg='lightblue')
         self.update_status("Ready")
-        self.set_emotion("Happy :)")
+        self.set_emotion("happy")
     
     def test_server(self):
         """Test server connection"""
         def test():
             try:
-                response = requests.get(f"{self.server_url}/health", timeout=3)
-                if response.status_code == 200:
-                    self.root.after(0, lambda: messagebox.showinfo(
-                        "Server Test",
-                        f"✅ Server connected!\n{self.server_url}"
-                    ))
-                else:
-                    self.root.after(0, lambda: messagebox.showwarning(
-                        "Server Test",
-                        f"❌ Server error: {response.status_code}"
-                    ))
+                self.client.health(timeout=3)
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Server Test",
+                    f"✅ Server connected!\n{self.server_url}"
+                ))
+            except ServerError as e:
+                self.root.after(0, lambda status=e.status_code: messagebox.showwarning(
+                    "Server Test",
+                    f"❌ Server error: {status}"
+                ))
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror(
+                self.root.after(0, lambda err=e: messagebox.showerror(
                     "Server Test",
-                    f"❌ Cannot connect:\n{e}"
+                    f"❌ Cannot connect:\n{err}"
                 ))
         
-        threading.Thread(target=test, daemon=True).start()
+        self.scheduler.submit('network', test)
     
     def run(self):
         """Run the application"""
@@ -474,6 +565,9 @@ class UltraMinimalNeoMind:
             print("🚀 Starting GUI...")
             self.root.mainloop()
             
+            if self.speech and self.speech.cache:
+                print(f"🔊 TTS cache: {self.speech.cache.stats()}")
+            
         except Exception as e:
             print(f"GUI error: {e}")
             messagebox.showerror("Error", f"GUI failed: {e}")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Bounded background work for the NeoMind GUIs
+One small executor per lane (network, ASR) replaces a new thread per
+message. Work belongs to a numbered turn; results are applied on the Tk
+thread strictly in turn order, and queued work from older turns can be
+cancelled when a newer turn supersedes it.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# lane -> (worker threads, max queued jobs)
+DEFAULT_LANES = {
+    'network': (2, 4),
+    'asr': (1, 2),
+}
+
+
+class Lane:
+    """A fixed-size executor that keeps at most `max_queued` turn jobs waiting"""
+
+    def __init__(self, name, workers, max_queued):
+        self.name = name
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"neomind-{name}")
+        self._queued = deque()  # (turn, future) not started yet
+        self._lock = threading.Lock()
+
+    def submit(self, turn, fn, *args, supersede=False):
+        """Queue fn(*args); returns (future, [cancelled turns])"""
+        cancelled = []
+        with self._lock:
+            self._prune()
+            if supersede:
+                for queued_turn, future in list(self._queued):
+                    if queued_turn is not None and turn is not None and queued_turn < turn \
+                            and future.cancel():
+                        cancelled.append(queued_turn)
+            # The bound is on turn work, which a newer turn makes stale anyway.
+            # Jobs outside any turn (server test, history pages) neither count
+            # nor get dropped: nothing would redo them.
+            turn_jobs = [job for job in self._queued if job[0] is not None and not job[1].done()]
+            while turn is not None and len(turn_jobs) >= self.max_queued:
+                job = turn_jobs.pop(0)
+                self._queued.remove(job)
+                if job[1].cancel():
+                    cancelled.append(job[0])
+            future = self._executor.submit(fn, *args)
+            self._queued.append((turn, future))
+        return future, cancelled
+
+    def _prune(self):
+        self._queued = deque((turn, future) for turn, future in self._queued
+                             if not (future.running() or future.done()))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TurnScheduler:
+    """Run work on bounded lanes and apply its results to Tk in turn order"""
+
+    def __init__(self, root, lanes=None):
+        self.root = root
+        self.lanes = {name: Lane(name, workers, max_queued)
+                      for name, (workers, max_queued) in (lanes or DEFAULT_LANES).items()}
+        self._lock = threading.Lock()
+        self._next_turn = 0
+        self._head = 0            # oldest turn whose results are not all applied
+        self._pending = {}        # turn -> callbacks waiting for the Tk thread
+        self._finished = set()
+        self._drain_scheduled = False
+
+    def new_turn(self):
+        with self._lock:
+            turn = self._next_turn
+            self._next_turn += 1
+            return turn
+
+    def submit(self, lane, fn, *args, turn=None, supersede=False, owns_turn=True):
+        """Run fn(*args) on a lane
+
+        supersede cancels jobs from older turns still waiting in the lane. When
+        the job is what finishes its turn (owns_turn), a cancelled job finishes
+        the turn empty so later turns are not held back.
+        """
+        future, cancelled = self.lanes[lane].submit(turn, fn, *args, supersede=supersede)
+        for cancelled_turn in cancelled:
+            print(f"Superseded turn {cancelled_turn} on {lane}")
+            if owns_turn and cancelled_turn is not None:
+                self.finish(cancelled_turn)
+        return future
+
+    def post(self, turn, callback):
+        """Apply callback on the Tk thread once every earlier turn has finished"""
+        with self._lock:
+            late = turn is None or turn < self._head
+            if not late:
+                self._pending.setdefault(turn, []).append(callback)
+        if late:
+            self.root.after(0, callback)
+        else:
+            self._schedule_drain()
+
+    def finish(self, turn, callback=None):
+        """Apply a final callback for the turn and let later turns through"""
+        with self._lock:
+            late = turn < self._head
+            if not late:
+                if callback:
+                    self._pending.setdefault(turn, []).append(callback)
+                self._finished.add(turn)
+        if not late:
+            self._schedule_drain()
+        elif callback:
+            self.root.after(0, callback)
+
+    def _schedule_drain(self):
+        with self._lock:
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        try:
+            self.root.after(0, self._drain)
+        except RuntimeError:
+            pass  # Tk is gone
+
+    def _drain(self):
+        """Tk thread: apply callbacks of the head turn, advancing past finished turns"""
+        while True:
+            with self._lock:
+                self._drain_scheduled = False
+                callbacks = self._pending.pop(self._head, [])
+                finished = self._head in self._finished
+                if finished:
+                    self._finished.discard(self._head)
+                    self._head += 1
+                more = finished and (self._head in self._pending or self._head in self._finished)
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Callback error: {e}")
+            if not more:
+                return
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.shutdown()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Startup profiling for the NeoMind GUIs
+Records how long each import and init step took, and when, relative to the
+first line of the app, so slow Pi boots can be traced to a specific step.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Timeline of named startup steps"""
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.steps = []  # (name, started_ms, duration_ms, thread)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        """Time a block: with profile.step("import whisper"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record a milestone such as 'window painted'"""
+        now = time.perf_counter()
+        self._record(name, now, now)
+
+    def _record(self, name, start, end):
+        with self._lock:
+            self.steps.append((name, (start - self.t0) * 1000, (end - start) * 1000,
+                               threading.current_thread().name))
+
+    def report(self, log=print):
+        """Log every step in start order"""
+        with self._lock:
+            steps = sorted(self.steps, key=lambda step: step[1])
+        log("⏱️ Startup profile (ms since launch):")
+        for name, started, duration, thread in steps:
+            log(f"   {started:8.1f}  +{duration:8.1f}  {name}  [{thread}]")
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Sentence-pipelined speech for the NeoMind GUIs
+Replies are split into sentences. A render thread turns each one into audio
+with pyttsx3's save_to_file while a playback thread plays the previous one
+through PyAudio, so speech starts after the first sentence is rendered rather
+than the whole reply. Playback goes out in short chunks, so cancel() (barge-in)
+cuts speech off within one chunk. Without PyAudio output, sentences are
+spoken one at a time with say()/runAndWait(), and cancel() takes effect at
+the next word.
+
+Rendered sentences are cached by (normalized text, voice, rate) in a memory
+LRU over a size-bounded directory of WAVs. Replies are highly repetitive, so
+most sentences play back without running the synthesizer at all.
+"""
+
+import hashlib
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict, namedtuple
+
+SENTENCE_RE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+CHUNK_MS = 50
+
+TTS_CACHE = os.environ.get('NEOMIND_TTS_CACHE', '1') != '0'
+TTS_CACHE_DIR = os.environ.get('NEOMIND_TTS_CACHE_DIR',
+                               os.path.join(os.path.expanduser('~'), '.cache', 'neomind', 'tts'))
+TTS_CACHE_MB = float(os.environ.get('NEOMIND_TTS_CACHE_MB', 64))
+TTS_MEMORY_CACHE_MB = float(os.environ.get('NEOMIND_TTS_MEMORY_CACHE_MB', 16))
+
+Audio = namedtuple('Audio', 'pcm rate channels width')
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_RE.findall(text) if s.strip(" .!?\n")]
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as wf:
+        return Audio(wf.readframes(wf.getnframes()), wf.getframerate(),
+                     wf.getnchannels(), wf.getsampwidth())
+
+
+class AudioCache:
+    """Content-addressed cache of rendered speech: memory LRU over a WAV directory
+
+    Both tiers are bounded in bytes. The disk tier evicts the least recently
+    used files, using mtime, which is refreshed on every hit.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, disk_bytes=int(TTS_CACHE_MB * 1024 * 1024),
+                 memory_bytes=int(TTS_MEMORY_CACHE_MB * 1024 * 1024)):
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.tmp'):  # renders interrupted by a crash
+                os.remove(entry.path)
+        self._memory = OrderedDict()  # key -> Audio
+        self._memory_used = 0
+        self._disk_used = sum(entry.stat().st_size for entry in os.scandir(directory)
+                              if entry.name.endswith('.wav'))
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(text, voice, rate):
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha256(f"{voice}\0{rate}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return audio
+        path = self.path(key)
+        try:
+            audio = read_wav(path)
+            os.utime(path)
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        with self._lock:
+            self._stats['disk_hits'] += 1
+            self._remember(key, audio)
+        return audio
+
+    def temp_path(self):
+        """Where to render a miss, so store() can rename it into place"""
+        fd, path = tempfile.mkstemp(prefix="render-", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        return path
+
+    def store(self, key, rendered_path, audio):
+        """Adopt a freshly rendered WAV for `key`"""
+        path = self.path(key)
+        os.replace(rendered_path, path)
+        with self._lock:
+            self._disk_used += os.path.getsize(path)
+            self._remember(key, audio)
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _remember(self, key, audio):
+        if key in self._memory:
+            return
+        self._memory[key] = audio
+        self._memory_used += len(audio.pcm)
+        while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted.pcm)
+            self._stats['evictions'] += 1
+
+    def _evict_disk(self):
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.wav')),
+                         key=lambda entry: entry.stat().st_mtime)
+        used = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if used <= self.disk_bytes * 0.9:
+                break
+            try:
+                used -= entry.stat().st_size
+                os.remove(entry.path)
+                with self._lock:
+                    self._stats['evictions'] += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_used = used
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._memory),
+                        memory_mb=round(self._memory_used / 1024 / 1024, 2),
+                        disk_mb=round(self._disk_used / 1024 / 1024, 2))
+
+
+class SpeechPipeline:
+    """Render sentence N+1 while sentence N plays
+
+    on_playing(True/False) follows the audio itself: it turns false while
+    the next sentence is still rendering and on cancel. It can drive a mouth
+    animation. on_done() fires once everything queued has been spoken. The
+    pyttsx3 engine is only touched from the render thread; cancel() just
+    bumps the generation, and the render thread stops the engine itself.
+    """
+
+    def __init__(self, engine, pa=None, on_playing=None, on_done=None, log=print, cache=None):
+        self.engine = engine
+        self.pa = pa
+        if cache is None and TTS_CACHE and pa:
+            try:
+                cache = AudioCache()
+            except OSError as e:
+                log(f"TTS cache unavailable: {e}")
+        self.cache = cache
+        self.on_playing = on_playing
+        self.on_done = on_done
+        self.log = log
+        self._sentences = queue.Queue()
+        self._rendered = queue.Queue(maxsize=1)  # at most one sentence rendered ahead
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = 0        # sentences queued, rendering or playing
+        self._speaking = None    # generation of the sentence say() is speaking
+        self._playing = False
+        self._streams = {}       # (rate, channels, width) -> open output stream
+        threading.Thread(target=self._render_loop, name="neomind-tts-render", daemon=True).start()
+        if pa:
+            threading.Thread(target=self._play_loop, name="neomind-tts-play", daemon=True).start()
+
+    # ---------- API ----------
+    def say(self, text, started_at=None):
+        """Queue text; started_at (perf_counter) starts the time-to-first-audio clock"""
+        sentences = split_sentences(text)
+        with self._lock:
+            generation = self._generation
+            self._pending += len(sentences)
+        for i, sentence in enumerate(sentences):
+            self._sentences.put((generation, sentence, started_at if i == 0 else None))
+
+    def cancel(self):
+        """Barge-in: stop the current sentence and drop everything queued"""
+        with self._lock:
+            self._generation += 1
+            self._pending = 0
+        for q in (self._sentences, self._rendered):
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+        self._set_playing(False)
+
+    @property
+    def speaking(self):
+        return self._pending > 0
+
+    # ---------- Threads ----------
+    def _render_loop(self):
+        if not self.pa:
+            # runAndWait() calls back here between words, on this thread
+            try:
+                self.engine.connect('started-word', self._stop_if_cancelled)
+            except Exception as e:
+                self.log(f"Speech can't be interrupted: {e}")
+        while True:
+            generation, sentence, started_at = self._sentences.get()
+            if generation != self._generation:
+                continue
+            if not self.pa:
+                self._speak_direct(generation, sentence, started_at)
+                continue
+            try:
+                audio = self._render(sentence)
+            except Exception as e:
+                self.log(f"TTS render error: {e}")
+                self._sentence_done(generation)
+                continue
+            self._rendered.put((generation, audio, started_at))
+
+    def _render(self, sentence):
+        key = None
+        if self.cache:
+            key = self.cache.key(sentence, self.engine.getProperty('voice'),
+                                 self.engine.getProperty('rate'))
+            audio = self.cache.get(key)
+            if audio:
+                return audio
+            path = self.cache.temp_path()
+        else:
+            fd, path = tempfile.mkstemp(prefix="neomind-tts-", suffix=".wav")
+            os.close(fd)
+        try:
+            self.engine.save_to_file(sentence, path)
+            self.engine.runAndWait()
+            audio = read_wav(path)
+            if key:
+                self.cache.store(key, path, audio)
+            return audio
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _play_loop(self):
+        while True:
+            generation, audio, started_at = self._rendered.get()
+            if generation != self._generation:
+                continue
+            try:
+                stream = self._stream(audio)
+                step = audio.rate * audio.channels * audio.width * CHUNK_MS // 1000
+                for offset in range(0, len(audio.pcm), step):
+                    if generation != self._generation:
+                        break
+                    if offset == 0:
+                        self._audio_started(started_at)
+                    stream.write(audio.pcm[offset:offset + step])
+            except Exception as e:
+                self.log(f"TTS playback error: {e}")
+            if self._rendered.empty():
+                self._set_playing(False)  # silent until the next sentence is rendered
+            self._sentence_done(generation)
+
+    def _speak_direct(self, generation, sentence, started_at):
+        self._speaking = generation
+        try:
+            self._audio_started(started_at)
+            self.engine.say(sentence)
+            self.engine.runAndWait()
+        except Exception as e:
+            self.log(f"Speech error: {e}")
+        self._speaking = None
+        self._set_playing(False)
+        self._sentence_done(generation)
+
+    def _stop_if_cancelled(self, name, location, length):
+        """Render thread, inside runAndWait(): end a sentence cancel() dropped"""
+        if self._speaking is not None and self._speaking != self._generation:
+            self.engine.stop()
+
+    # ---------- Helpers ----------
+    def _stream(self, audio):
+        key = (audio.rate, audio.channels, audio.width)
+        if key not in self._streams:
+            self._streams[key] = self.pa.open(format=self.pa.get_format_from_width(audio.width),
+                                              channels=audio.channels, rate=audio.rate,
+                                              output=True)
+        return self._streams[key]
+
+    def _audio_started(self, started_at):
+        self._set_playing(True)
+        if started_at is not None:
+            self.log(f"⏱️ First audio after {(time.perf_counter() - started_at) * 1000:.0f} ms")
+
+    def _sentence_done(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending = max(0, self._pending - 1)
+            drained = self._pending == 0
+        if drained:
+            self._set_playing(False)
+            if self.on_done:
+                self.on_done()
+
+    def _set_playing(self, playing):
+        with self._lock:
+            changed = self._playing != playing
+            self._playing = playing
+        if changed and self.on_playing:
+            self.on_playing(playing)
@@ -5,8 +5,8 @@ NeoMind Ultra-Minimal – Enhanced GUI with Animated Eyes
 • Keeps the same ultra-light dependency footprint (Tkinter + stdlib + optional audio)
 • Adds a small "face" canvas that renders two eyes and updates them according to
   the current emotional state (happy, excited, thinking, listening, confused).
-• Implements a lightweight blinking animation (randomised 3-6 s) that works
-  even when the app is idle.
+• Eyes tween smoothly between emotions and blink (randomised 3-6 s) from a
+  fixed-timestep animation loop that works even when the app is idle.
 • Everything still works on plain X11 without additional fonts: colours + simple
   vector shapes only.
 
@@ -17,39 +17,57 @@ import os
 import sys
 import warnings
 import threading
-import random
+import time
 from datetime import datetime
 
+from emotion_styles import DEFAULT, STYLES, style
+from face_anim import FaceAnimator
+from startup import StartupProfile
+
+profile = StartupProfile()
+
 # ═══════════ Runtime Noise Suppression ═══════════
 warnings.filterwarnings("ignore")
 os.environ["ALSA_SUPPRESS_ERRORS"] = "1"
 os.environ["PYTHONWARNINGS"] = "ignore"
 
 # ═══════════ Minimal Imports ═══════════
-import tkinter as tk
-from tkinter import messagebox
-import requests
+with profile.step("import tkinter + client"):
+    import tkinter as tk
+    from tkinter import messagebox
 
-# Optional audio stack
+    from chat_view import ChatView
+    from neomind_client import NeoMindClient, ServerError, ServerUnavailable
+
+# Optional audio stack – imported after the window is up (whisper pulls in torch)
+pyaudio = whisper = pyttsx3 = None
 has_audio = False
 has_whisper = False
 has_tts = False
-try:
-    import pyaudio
-    import webrtcvad  # noqa: F401  (used only to verify availability)
-    has_audio = True
-except Exception:
-    pass
-try:
-    import whisper  # noqa: F401
-    has_whisper = True
-except Exception:
-    pass
-try:
-    import pyttsx3
-    has_tts = True
-except Exception:
-    pass
+
+
+def load_optional_modules(with_whisper=True):
+    global pyaudio, whisper, pyttsx3, has_audio, has_whisper, has_tts
+    try:
+        with profile.step("import pyaudio + webrtcvad"):
+            import pyaudio
+            import webrtcvad  # noqa: F401  (used only to verify availability)
+        has_audio = True
+    except Exception:
+        pass
+    if with_whisper:
+        try:
+            with profile.step("import whisper (torch)"):
+                import whisper  # noqa: F401
+            has_whisper = True
+        except Exception:
+            pass
+    try:
+        with profile.step("import pyttsx3"):
+            import pyttsx3
+        has_tts = True
+    except Exception:
+        pass
 
 print("🧠 NeoMind Ultra-Minimal – Starting…")
 
@@ -66,44 +84,73 @@ class UltraMinimalNeoMind:
     def __init__(self):
         # ---------- State ----------
         self.child_name = "friend"
-        self.server_url = "http://localhost:5000"
-        self.current_emotion = "Happy :)"
+        self.chat_child = self.child_name  # whose history the chat view pages in
+        self.client = NeoMindClient()
+        self.server_url = self.client.base_url
+        self.current_emotion = DEFAULT
         self.is_listening = False
-        self._blink_job = None  # after() handle
 
         # ---------- Optional components ----------
         self.whisper_model = None
         self.tts_engine = None
+        self.speech = None  # SpeechPipeline once TTS is loaded
         self.audio = None
 
         # ---------- Init ----------
-        self.init_components()
-        self.create_gui()
+        with profile.step("create window"):
+            self.create_gui()
+        # Paint first, then load ASR/TTS/audio in the background
+        self.root.after_idle(lambda: profile.mark("window painted"))
+        threading.Thread(target=self.init_components, name="neomind-loader", daemon=True).start()
 
     # ═══════════  Sub-system Init  ═══════════
     def init_components(self):
+        """Runs on the loader thread; touches Tk only via after()"""
+        # A running ASR service saves this process its own copy of Whisper
+        from asr import connect_asr_service
+        with profile.step("look for ASR service"):
+            whisper_model = connect_asr_service()
+        if whisper_model:
+            print("Using shared ASR service ✔")
+        load_optional_modules(with_whisper=whisper_model is None)
         if has_whisper:
             try:
                 print("Loading Whisper…")
-                self.whisper_model = whisper.load_model("tiny.en")
+                with profile.step("load Whisper model"):
+                    whisper_model = whisper.load_model("tiny.en")
                 print("Whisper loaded ✔")
             except Exception as e:
                 print(f"Whisper failed: {e}")
         if has_tts:
             try:
-                self.tts_engine = pyttsx3.init()
-                self.tts_engine.setProperty("rate", 150)
+                with profile.step("init pyttsx3"):
+                    self.tts_engine = pyttsx3.init()
+                    self.tts_engine.setProperty("rate", 150)
             except Exception as e:
                 print(f"TTS failed: {e}")
         if has_audio:
             try:
                 import contextlib
-                with open(os.devnull, "w") as devnull:
-                    with contextlib.redirect_stderr(devnull):
-                        self.audio = pyaudio.PyAudio()
+                with profile.step("init PyAudio"):
+                    with open(os.devnull, "w") as devnull:
+                        with contextlib.redirect_stderr(devnull):
+                            self.audio = pyaudio.PyAudio()
                 print("Audio stack ready ✔")
             except Exception as e:
                 print(f"Audio failed: {e}")
+        if self.tts_engine:
+            from tts import SpeechPipeline
+            self.speech = SpeechPipeline(self.tts_engine, self.audio)
+        self.whisper_model = whisper_model
+        self.root.after(0, self.on_components_ready)
+
+    def on_components_ready(self):
+        profile.mark("components ready")
+        if self.audio and self.whisper_model:
+            self.listen_btn.config(text="Listen", state="normal")
+        else:
+            self.listen_btn.config(text="No voice", state="disabled")
+        profile.report()
 
     # ═══════════  GUI  ═══════════
     def create_gui(self):
@@ -146,9 +193,9 @@ class UltraMinimalNeoMind:
         # Bindings
         self.root.bind("<Return>", lambda e: self.send_message())
 
-        # Initial face + blink schedule
-        self.draw_face(self.current_emotion)
-        self.schedule_blink()
+        # Eyes are tweened between emotions and blink on their own; no blink while listening
+        self.face = FaceAnimator(self.face_canvas, self.face_pose, CYAN, emotion=self.current_emotion,
+                                 can_blink=lambda state: state["emotion"] != "listen")
 
         print("🚀 GUI created successfully")
 
@@ -167,24 +214,18 @@ class UltraMinimalNeoMind:
         buttons = tk.Frame(parent, bg="lightgray")
         buttons.pack(fill="x", pady=5)
 
-        if self.audio and self.whisper_model:
-            self.listen_btn = tk.Button(buttons, text="Listen", command=self.toggle_listening, bg="lightblue")
-            self.listen_btn.pack(side="left", padx=2)
+        # enabled by on_components_ready()
+        self.listen_btn = tk.Button(buttons, text="Loading…", command=self.toggle_listening, bg="lightblue",
+                                    state="disabled")
+        self.listen_btn.pack(side="left", padx=2)
 
         tk.Button(buttons, text="Test Server", command=self.test_server, bg="lightcoral").pack(side="left", padx=2)
 
-        emotion_defs = [
-            ("Happy :)", "lightyellow"),
-            ("Excited :D", "lightpink"),
-            ("Think…", "lightcyan"),
-            ("Listen |", "lightblue"),
-            ("Confused ?", "wheat"),
-        ]
-        for emo, color in emotion_defs:
+        for emo, emo_style in STYLES.items():
             tk.Button(
                 buttons,
-                text=emo,
-                bg=color,
+                text=emo_style.label,
+                bg=emo_style.colour,
                 command=lambda e=emo: self.set_emotion(e),
             ).pack(side="left", padx=1)
 
@@ -198,6 +239,8 @@ class UltraMinimalNeoMind:
             chat_frame, height=8, wrap="word", bg="white", fg="black", state="disabled", bd=2
         )
         self.chat_text.pack(fill="both", expand=True)
+        # Coalesced, bounded log; older turns are paged in from the server
+        self.chat = ChatView(self.chat_text, load_older=self.load_history)
 
         input_frame = tk.Frame(chat_frame, bg="lightgray")
         input_frame.pack(fill="x", pady=2)
@@ -211,90 +254,57 @@ class UltraMinimalNeoMind:
         tk.Label(parent, text="Press Enter to send messages", bg="lightgray", fg="gray").pack(pady=2)
 
     # ═══════════ Face Rendering ═══════════
-    def draw_face(self, emotion):
-        """Render eyes according to emotion on the canvas."""
-        cv = self.face_canvas
-        cv.delete("all")
-
-        # geometry helpers
+    @staticmethod
+    def face_pose(state):
+        """Eye bboxes for an emotion; the animator tweens between them."""
         w, h = 200, 100
         eye_w, eye_h = 40, 40
         left_x = w * 0.3 - eye_w / 2
         right_x = w * 0.7 - eye_w / 2
         y = h * 0.5 - eye_h / 2
 
-        def open_eye(x):
-            cv.create_oval(x, y, x + eye_w, y + eye_h, fill=CYAN, outline=CYAN)
+        def open_eye(x, dy=0, grow=0):
+            return (x - grow, y + dy - grow, x + eye_w + grow, y + dy + eye_h + grow)
 
         def closed_eye(x):
-            cv.create_rectangle(x, y + eye_h / 2 - 2, x + eye_w, y + eye_h / 2 + 2, fill=CYAN, outline=CYAN)
-
-        if "Happy" in emotion or "Listen" in emotion:
-            open_eye(left_x)
-            open_eye(right_x)
-        elif "Excited" in emotion:
-            # larger eyes
-            eye_h2 = eye_w2 = 55
-            cv.create_oval(left_x - 7, y - 7, left_x - 7 + eye_w2, y - 7 + eye_h2, fill=CYAN, outline=CYAN)
-            cv.create_oval(right_x - 7, y - 7, right_x - 7 + eye_w2, y - 7 + eye_h2, fill=CYAN, outline=CYAN)
-        elif "Think" in emotion:
-            # eyes looking up (offset y)
-            cv.create_oval(left_x, y - 8, left_x + eye_w, y - 8 + eye_h, fill=CYAN, outline=CYAN)
-            cv.create_oval(right_x, y - 8, right_x + eye_w, y - 8 + eye_h, fill=CYAN, outline=CYAN)
-        elif "Confused" in emotion:
-            # one open, one half closed
-            open_eye(left_x)
-            closed_eye(right_x)
-        else:
-            # neutral closed
-            closed_eye(left_x)
-            closed_eye(right_x)
-
-    # ═══════════ Blinking ═══════════
-    def schedule_blink(self):
-        delay = random.randint(3000, 6000)  # 3-6 s
-        self._blink_job = self.root.after(delay, self._blink)
-
-    def _blink(self):
-        # Close eyes quickly then reopen
-        if "Listen" not in self.current_emotion:  # don’t blink while listening
-            self.draw_face("BLINK")
-            self.root.after(150, lambda: self.draw_face(self.current_emotion))
-        self.schedule_blink()
+            return (x, y + eye_h / 2 - 2, x + eye_w, y + eye_h / 2 + 2)
+
+        def eye(x, shape):
+            if state["blink"] or not shape.open:
+                return closed_eye(x)
+            return open_eye(x, dy=shape.dy * eye_h, grow=shape.grow * eye_w)
+
+        left, right = style(state["emotion"]).eyes
+        return {"left": eye(left_x, left), "right": eye(right_x, right)}
 
     # ═══════════  Chat helpers  ═══════════
     def update_status(self, text):
         self.status_var.set(text)
-        self.root.update_idletasks()
 
     def add_to_chat(self, speaker, message):
-        self.chat_text.config(state="normal")
-        ts = datetime.now().strftime("%H:%M")
-        self.chat_text.insert("end", f"[{ts}] {speaker}: {message}\n\n")
-        self.chat_text.config(state="disabled")
-        self.chat_text.see("end")
+        if speaker != "Neo" and speaker != self.chat_child:
+            # Another child: start their log, paged from their own history
+            self.chat.clear()
+            self.chat_child = speaker
+        return self.chat.add(speaker, message)
+
+    def load_history(self, before, limit):
+        """Older turns for the chat view (worker thread)"""
+        child_name = self.chat_child
+        data = self.client.history(child_name, before, limit)
+        turns = [(turn["seq"], child_name if turn["type"] == "user" else "Neo", turn["message"],
+                  datetime.fromisoformat(turn["timestamp"]))
+                 for turn in data["turns"]]
+        return turns, data["has_more"]
 
     # ═══════════  Emotion setter  ═══════════
-    def set_emotion(self, emotion_text):
-        self.current_emotion = emotion_text
-        self.emotion_label.config(text=f"Neo is {emotion_text}")
-        # background colour sync
-        colour_map = {
-            "Happy": "lightyellow",
-            "Excited": "lightpink",
-            "Think": "lightcyan",
-            "Listen": "lightblue",
-            "Confused": "wheat",
-        }
-        for k, col in colour_map.items():
-            if k in emotion_text:
-                self.emotion_frame.config(bg=col)
-                self.emotion_label.config(bg=col)
-                break
-        else:
-            self.emotion_frame.config(bg="lightgray")
-            self.emotion_label.config(bg="lightgray")
-        self.draw_face(emotion_text)
+    def set_emotion(self, emotion):
+        """Show an emotion name (see emotion_styles.STYLES)."""
+        self.current_emotion = emotion
+        emo_style = style(emotion)
+        self.emotion_label.config(text=f"Neo is {emo_style.label}", bg=emo_style.colour)
+        self.emotion_frame.config(bg=emo_style.colour)
+        self.face.set(emotion=emotion)
 
     # ═══════════  Message flow  ═══════════
     def send_message(self):
@@ -303,52 +313,50 @@ class UltraMinimalNeoMind:
             return
         self.message_var.set("")
         child_name = self.name_var.get() or "friend"
-        self.add_to_chat(child_name, msg)
-        self.process_message(msg, child_name)
+        self.start_turn(msg, child_name)
+
+    def start_turn(self, msg, child_name):
+        """Show the child's message and ask Neo"""
+        self.process_message(msg, child_name, self.add_to_chat(child_name, msg))
 
-    def process_message(self, msg, child_name):
+    def process_message(self, msg, child_name, msg_turn=None):
+        self.stop_speaking()
         self.update_status("Thinking…")
-        self.set_emotion("Think…")
+        self.set_emotion("think")
+        sent_at = time.perf_counter()
+        ask = self.latest_ask = object()   # a newer message silences this reply
 
         def worker():
+            count = None
+            emo = DEFAULT
             try:
-                r = requests.post(
-                    f"{self.server_url}/chat/text",
-                    json={"message": msg, "child_name": child_name},
-                    timeout=5,
-                )
-                response_text = r.json().get("response", "I got your message!") if r.status_code == 200 else f"Server error: {r.status_code}"
-            except requests.exceptions.ConnectionError:
+                data = self.client.chat(msg, child_name)
+                response_text = data.get("response", "I got your message!")
+                count = data.get("conversation_count")
+                emo = data.get("emotion", DEFAULT)  # classified by the server
+            except ServerError as e:
+                response_text = str(e)
+            except ServerUnavailable:
                 response_text = "I can't connect to my knowledge server, but I'm here to chat with you!"
             except Exception as e:
                 response_text = f"Connection problem: {e}"[:80]
 
-            # simple sentiment → emotion mapping
-            lowered = response_text.lower()
-            if any(w in lowered for w in ("great", "awesome", "amazing")):
-                emo = "Excited :D"
-            elif any(w in lowered for w in ("confused", "sorry", "not sure")):
-                emo = "Confused ?"
-            else:
-                emo = "Happy :)"
-
-            self.root.after(0, lambda: self.handle_response(response_text, emo))
+            self.root.after(0, lambda: self.handle_response(response_text, emo, sent_at, count,
+                                                            msg_turn, ask))
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def handle_response(self, text, emotion):
-        self.add_to_chat("Neo", text)
+    def handle_response(self, text, emotion, sent_at=None, count=None, msg_turn=None, ask=None):
+        self.chat.confirm(count, msg_turn, self.add_to_chat("Neo", text))
         self.set_emotion(emotion)
         self.update_status("Ready")
-        if self.tts_engine:
-            threading.Thread(target=lambda: self._speak(text), daemon=True).start()
+        if self.speech and (ask is None or ask is self.latest_ask):
+            self.speech.say(text, sent_at)
 
-    def _speak(self, txt):
-        try:
-            self.tts_engine.say(txt)
-            self.tts_engine.runAndWait()
-        except Exception as e:
-            print(f"Speech error: {e}")
+    def stop_speaking(self):
+        """Barge-in: cut Neo off when the child talks or types"""
+        if self.speech:
+            self.speech.cancel()
 
     # ═══════════  Voice I/O (unchanged)  ═══════════
     def toggle_listening(self):
@@ -361,25 +369,25 @@ class UltraMinimalNeoMind:
             self.start_listening()
 
     def start_listening(self):
+        self.stop_speaking()
         self.is_listening = True
         self.listen_btn.config(text="Stop", bg="lightcoral")
         self.update_status("Listening…")
-        self.set_emotion("Listen |")
+        self.set_emotion("listen")
 
         def record():
+            from asr import Endpointer, capture_utterance, transcribe_pcm
+
             try:
+                endpointer = Endpointer()
                 stream = self.audio.open(
                     format=pyaudio.paInt16,
                     channels=1,
                     rate=16000,
                     input=True,
-                    frames_per_buffer=1024,
+                    frames_per_buffer=endpointer.frame_samples,
                 )
-                frames = []
-                for _ in range(int(16000 * 3 / 1024)):
-                    if not self.is_listening:
-                        break
-                    frames.append(stream.read(1024, exception_on_overflow=False))
+                utterance = capture_utterance(stream, endpointer, lambda: self.is_listening)
                 stream.stop_stream()
                 stream.close()
             except Exception as e:
@@ -387,30 +395,23 @@ class UltraMinimalNeoMind:
                 self.root.after(0, self.stop_listening)
                 return
 
-            if not frames or not self.is_listening:
+            if not utterance or not self.is_listening:
                 self.root.after(0, self.stop_listening)
                 return
 
-            import tempfile, wave
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                wf = wave.open(tmp.name, "wb")
-                wf.setnchannels(1)
-                wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
-                wf.setframerate(16000)
-                wf.writeframes(b"".join(frames))
-                wf.close()
-                path = tmp.name
-
             self.root.after(0, lambda: self.update_status("Processing…"))
             try:
-                text = self.whisper_model.transcribe(path)["text"].strip()
+                started = time.perf_counter()
+                text = transcribe_pcm(self.whisper_model, utterance.pcm)
+                done = time.perf_counter()
+                print(f"⏱️ End of speech → text {(done - utterance.speech_ended) * 1000:.0f} ms "
+                      f"(ASR {(done - started) * 1000:.0f} ms)")
             except Exception as e:
                 print(f"Whisper error: {e}")
                 text = ""
             if text:
                 child_name = self.name_var.get() or "friend"
-                self.root.after(0, lambda: self.add_to_chat(child_name, text))
-                self.root.after(0, lambda: self.process_message(text, child_name))
+                self.root.after(0, lambda: self.start_turn(text, child_name))
             self.root.after(0, self.stop_listening)
 
         threading.Thread(target=record, daemon=True).start()
@@ -420,17 +421,16 @@ class UltraMinimalNeoMind:
         if hasattr(self, "listen_btn"):
             self.listen_btn.config(text="Listen", bg="lightblue")
         self.update_status("Ready")
-        self.set_emotion("Happy :)")
+        self.set_emotion("happy")
 
     # ═══════════  Utils  ═══════════
     def test_server(self):
         def check():
             try:
-                r = requests.get(f"{self.server_url}/health", timeout=3)
-                if r.status_code == 200:
-                    self.root.after(0, lambda: messagebox.showinfo("Server Test", "✅ Server connected!"))
-                else:
-                    self.root.after(0, lambda: messagebox.showwarning("Server Test", f"❌ Status: {r.status_code}"))
+                self.client.health(timeout=3)
+                self.root.after(0, lambda: messagebox.showinfo("Server Test", "✅ Server connected!"))
+            except ServerError as e:
+                self.root.after(0, lambda status=e.status_code: messagebox.showwarning("Server Test", f"❌ Status: {status}"))
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror("Server Test", f"❌ {e}"))
         threading.Thread(target=check, daemon=True).start()
@@ -439,6 +439,8 @@ class UltraMinimalNeoMind:
     def run(self):
         self.add_to_chat("Neo", f"Hello {self.child_name}! I'm running in minimal mode – with eyes now!")
         self.root.mainloop()
+        if self.speech and self.speech.cache:
+            print(f"TTS cache: {self.speech.cache.stats()}")
 
 
 # ═══════════ Entry Point ═══════════
@@ -13,6 +13,12 @@ This build adds:
    • `NEOMIND_NO_MIC=1`  → run GUI only (no pyaudio / vad)
    • `NEOMIND_DEBUG=1`   → verbose logs (default on)
 3. **Heartbeat logger** every 5 sec so you know the loop hasn’t frozen.
+4. **Live captions** – while listening, the growing utterance is re-decoded
+   in the background and shown under the face (`NEOMIND_PARTIALS=0` to turn
+   off); the final pass only decodes what the partials haven't settled.
+5. **Wake-word spotter** – while IDLE, utterances are matched against
+   enrolled samples (`python3 wakeword.py enroll`) with MFCC + DTW; Whisper
+   only runs after the wake word fires.
 
 If you still hit segfaults, start with **both** flags enabled:
 
@@ -21,14 +27,21 @@ NEOMIND_NO_TTS=1 NEOMIND_NO_MIC=1 python3 neomind_face_safe.py
 ```
 Then re-enable one feature at a time.
 """
-import os, sys, warnings, random, threading, time, tempfile, wave, ctypes, tkinter as tk
+import os, sys, warnings, threading, time, ctypes
 from datetime import datetime
-import requests
+from startup import StartupProfile
+from emotion_styles import style
+from face_anim import FaceAnimator
+profile = StartupProfile()
+with profile.step("import tkinter + requests"):
+    import tkinter as tk
+    import requests
 
 # ─────────────────── Logger & Helpers ───────────────────
 DEBUG   = os.getenv("NEOMIND_DEBUG", "1") != "0"
 NO_TTS  = os.getenv("NEOMIND_NO_TTS", "0") == "1"
 NO_MIC  = os.getenv("NEOMIND_NO_MIC", "0") == "1"
+PARTIALS = os.getenv("NEOMIND_PARTIALS", "1") != "0"
 
 def log(msg):
     if DEBUG:
@@ -46,38 +59,49 @@ except OSError:
 os.environ.setdefault("ALSA_SUPPRESS_ERRORS", "1")
 
 # ───────────── Conditional Heavy Imports ───────────────
-try:
-    if not NO_MIC:
-        import pyaudio, webrtcvad
-        has_audio = True
-        log("Audio stack detected")
-    else:
-        has_audio = False
-        log("Audio disabled via NEOMIND_NO_MIC")
-except Exception as e:
-    has_audio = False; log(f"Audio unavailable: {e}")
+# Loaded on a background thread once the face is on screen (whisper pulls in torch)
+whisper = None
+has_audio = has_whisper = has_tts = False
 
-try:
-    import whisper
-    has_whisper = True; log("Whisper available ✔")
-except Exception as e:
-    has_whisper = False; log(f"Whisper not available: {e}")
+def load_optional_modules(with_whisper=True):
+    global whisper, has_audio, has_whisper, has_tts
+    try:
+        if not NO_MIC:
+            with profile.step("import pyaudio + webrtcvad"):
+                import pyaudio, webrtcvad
+            has_audio = True
+            log("Audio stack detected")
+        else:
+            has_audio = False
+            log("Audio disabled via NEOMIND_NO_MIC")
+    except Exception as e:
+        has_audio = False; log(f"Audio unavailable: {e}")
 
-try:
-    if not NO_TTS:
-        import pyttsx3
-        has_tts = True; log("pyttsx3 available ✔")
-    else:
-        has_tts = False; log("TTS disabled via NEOMIND_NO_TTS")
-except Exception as e:
-    has_tts = False; log(f"TTS unavailable: {e}")
+    if with_whisper:
+        try:
+            with profile.step("import whisper (torch)"):
+                import whisper
+            has_whisper = True; log("Whisper available ✔")
+        except Exception as e:
+            has_whisper = False; log(f"Whisper not available: {e}")
+
+    try:
+        if not NO_TTS:
+            with profile.step("import pyttsx3"):
+                import pyttsx3
+            has_tts = True; log("pyttsx3 available ✔")
+        else:
+            has_tts = False; log("TTS disabled via NEOMIND_NO_TTS")
+    except Exception as e:
+        has_tts = False; log(f"TTS unavailable: {e}")
 
 # ───────────── UI constants ─────────────
 WIDTH, HEIGHT = 480, 320
 CYAN, BLACK = "#00FFCC", "#000000"
-BLINK_MIN_MS, BLINK_MAX_MS = 3000, 6000
-MOUTH_PERIOD_MS = 160
+FPS = 30               # face animation; blink/mouth timing lives in face_anim
+CAPTION_CHARS = 44
 WAKE_WORDS = ("hey", "hi", "hello")
+MAX_UTTERANCE_S = 15
 
 # ───────────── Kid-voice helper ─────────────
 def pick_child_voice(engine):
@@ -90,151 +114,210 @@ def pick_child_voice(engine):
     return None
 
 # ───────────── Canvas (eyes + mouth) ─────────────
+# All face state lives in a FaceAnimator on the Tk thread. Workers only call
+# set(); poses are tweened at FPS and late frames are dropped, not queued.
 class Face(tk.Canvas):
     def __init__(self, master):
         super().__init__(master, width=WIDTH, height=HEIGHT, bg=BLACK, highlightthickness=0)
         self.pack()
-        self.emotion, self.mouth_open = "Happy", False
-        self._blink_job = self._mouth_job = None
-        self.draw(); self._schedule_blink();
-
-    # Draw eyes & mouth
-    def draw(self):
-        self.delete("all"); ew=80; eh=80
-        lx, rx, y = WIDTH*.25-ew/2, WIDTH*.75-ew/2, HEIGHT*.35-eh/2
-        def open_eye(x):  self.create_oval(x,y,x+ew,y+eh,fill=CYAN,outline=CYAN)
-        def closed_eye(x):self.create_rectangle(x,y+eh/2-4,x+ew,y+eh/2+4,fill=CYAN,outline=CYAN)
-        e=self.emotion
-        if e.startswith(("Happy","Listen")):      open_eye(lx);open_eye(rx)
-        elif e.startswith("Excited"):
-            self.create_oval(lx-10,y-10,lx+ew+10,y+eh+10,fill=CYAN,outline=CYAN)
-            self.create_oval(rx-10,y-10,rx+ew+10,y+eh+10,fill=CYAN,outline=CYAN)
-        elif e.startswith("Think"):               open_eye(lx);open_eye(rx);self.move("all",0,-15)
-        elif e.startswith("Confused"):            open_eye(lx);closed_eye(rx)
-        else:                                      closed_eye(lx);closed_eye(rx)
-        # mouth
-        self.delete("mouth"); my=HEIGHT*.7; mw=180; mh=60
-        if self.mouth_open:
-            self.create_oval(WIDTH/2-mw/2,my-mh/2,WIDTH/2+mw/2,my+mh/2,fill=CYAN,outline=CYAN,tags="mouth")
-        else:
-            self.create_rectangle(WIDTH/2-mw/2,my-4,WIDTH/2+mw/2,my+4,fill=CYAN,outline=CYAN,tags="mouth")
-
-    # Blink
-    def _schedule_blink(self):
-        self._blink_job = self.after(random.randint(BLINK_MIN_MS,BLINK_MAX_MS), self._blink)
-    def _blink(self):
-        prev=self.emotion; self.emotion="Blink"; self.draw()
-        self.after(120, lambda: (setattr(self,'emotion',prev), self.draw(), self._schedule_blink()))
-
-    # Mouth while speaking
-    def mouth_start(self):
-        if self._mouth_job: return
-        self.mouth_open=True; self.draw(); self._mouth_job=self.after(MOUTH_PERIOD_MS,self._toggle_mouth)
-    def _toggle_mouth(self):
-        self.mouth_open=not self.mouth_open; self.draw(); self._mouth_job=self.after(MOUTH_PERIOD_MS,self._toggle_mouth)
-    def mouth_stop(self):
-        if self._mouth_job: self.after_cancel(self._mouth_job); self._mouth_job=None
-        self.mouth_open=False; self.draw()
+        self._caption=self.create_text(WIDTH/2,HEIGHT-24,text="",fill=CYAN,font=("Helvetica",14),state="hidden")
+        self._shown_caption=""
+        self.anim=FaceAnimator(self,self._pose,CYAN,fps=FPS,on_state=self._on_state,caption="")
+
+    # Queue a change (emotion / talking / caption); safe from any thread
+    def set(self,**changes): self.anim.set(**changes)
+
+    # Target geometry for a state: feature -> bbox
+    @staticmethod
+    def _pose(s):
+        ew=eh=80; lx, rx, y = WIDTH*.25-ew/2, WIDTH*.75-ew/2, HEIGHT*.35-eh/2
+        def eye(x,shape):
+            if not shape.open or s["blink"]: return (x,y+eh/2-4,x+ew,y+eh/2+4)
+            dy,grow=shape.dy*eh,shape.grow*ew
+            return (x-grow,y+dy-grow,x+ew+grow,y+dy+eh+grow)
+        left,right=style(s["emotion"]).eyes
+        my=HEIGHT*.7; mw=180; mh=60 if s["mouth_open"] else 8
+        return {"left":eye(lx,left),"right":eye(rx,right),
+                "mouth":(WIDTH/2-mw/2,my-mh/2,WIDTH/2+mw/2,my+mh/2)}
+
+    # Interim / final transcript under the mouth
+    def _on_state(self,s):
+        text=s["caption"] if len(s["caption"])<=CAPTION_CHARS else "…"+s["caption"][-CAPTION_CHARS+1:]
+        if text==self._shown_caption: return
+        self._shown_caption=text
+        self.itemconfig(self._caption,text=text,state="normal" if text else "hidden")
+
+    # Frames drawn/dropped, mean/max draw time since the last call (for the heartbeat)
+    def frame_stats(self): return self.anim.frame_stats()
 
 # ───────────── Main Assistant ─────────────
 class NeoMind:
     def __init__(self):
         self.state="IDLE"
-        self.gui  = Face(tk.Tk()); self.gui.master.attributes("-fullscreen",True)
-        self.audio = self.stream = self.vad = None
+        with profile.step("create face"):
+            self.gui  = Face(tk.Tk()); self.gui.master.attributes("-fullscreen",True)
+        self.audio = self.stream = self.vad = self.ring = None
         self.rate  = 16000; self.chunk = 160
-        self.whisper_model = None
-        self.tts_engine    = None; self.stop_tts = threading.Event()
-        if has_audio:   self._init_audio()
-        if has_tts:     self._init_tts()
-        if has_whisper: self.whisper_model=whisper.load_model("tiny.en")
-        if has_audio:   threading.Thread(target=self._mic_loop,daemon=True).start()
+        self.whisper_model = None; self.wake = None; self.asr_lock = threading.Lock(); self.partial = None
+        self.tts_engine    = None; self.speech = None
+        # Face first; mic, TTS and Whisper come up in the background
+        self.gui.after_idle(lambda: profile.mark("face painted"))
+        threading.Thread(target=self._load_components,name="neomind-loader",daemon=True).start()
         # Heartbeat log
+        self._beat=None
         if DEBUG: self._heartbeat()
         self.gui.master.protocol("WM_DELETE_WINDOW", self._shutdown)
         self.gui.master.mainloop()
 
+    # Background loader: the kiosk starts listening once everything is ready
+    def _load_components(self):
+        # Several kiosks per box share one model through the ASR service when it runs
+        from asr import connect_asr_service
+        with profile.step("look for ASR service"): self.whisper_model=connect_asr_service()
+        if self.whisper_model: log("Using shared ASR service ✔")
+        load_optional_modules(with_whisper=self.whisper_model is None)
+        if has_audio:   self._init_audio()
+        if has_tts:     self._init_tts()
+        if self.tts_engine:
+            from tts import SpeechPipeline
+            # Mouth follows real playback; speech done → back to IDLE
+            self.speech=SpeechPipeline(self.tts_engine,self.audio,on_playing=self._on_playing,
+                                       on_done=self._speech_done,log=log)
+        if has_whisper:
+            with profile.step("load Whisper model"): self.whisper_model=whisper.load_model("tiny.en")
+        self._init_wake_word()
+        if self.audio:  threading.Thread(target=self._mic_loop,daemon=True).start()
+        profile.mark("components ready"); profile.report(log)
+
     # Heartbeat every 5s
     def _heartbeat(self):
-        log(f"Heartbeat – state={self.state}"); self.gui.after(5000, self._heartbeat)
+        mic=f" mic={self.ring.stats()}" if self.ring else ""
+        tts=f" tts_cache={self.speech.cache.stats()}" if self.speech and self.speech.cache else ""
+        now,cpu=time.perf_counter(),time.process_time()
+        if self._beat: log(f"Face: {self.gui.frame_stats()}, process CPU {(cpu-self._beat[1])/(now-self._beat[0])*100:.1f}%")
+        self._beat=(now,cpu)
+        log(f"Heartbeat – state={self.state}{mic}{tts}"); self.gui.after(5000, self._heartbeat)
 
     # Audio init safely
     def _init_audio(self):
         import pyaudio, webrtcvad
         try:
-            pa=pyaudio.PyAudio(); idx=0
+            with profile.step("init PyAudio"): pa=pyaudio.PyAudio()
+            idx=0
             self.rate=16000
-            self.stream=pa.open(format=pyaudio.paInt16,channels=1,rate=self.rate,input=True,input_device_index=idx,frames_per_buffer=int(self.rate/100))
+            from mic import MicRing
+            self.ring=MicRing(self.rate,seconds=MAX_UTTERANCE_S+5)
+            self.stream=self.ring.open(pa,int(self.rate/100),input_device_index=idx)
             self.vad=webrtcvad.Vad(2); self.audio=pa
-            log("Mic opened @16 kHz")
+            log("Mic opened @16 kHz (callback → ring buffer)")
         except Exception as e:
             log(f"Mic init failed, disabling audio: {e}"); self.audio=None
 
+    # Wake-word spotter; without enrolled templates Whisper checks WAKE_WORDS instead
+    def _init_wake_word(self):
+        try:
+            from wakeword import WakeWordDetector, WAKE_DIR
+            with profile.step("load wake-word templates"): det=WakeWordDetector.from_dir()
+            if det.ready: self.wake=det; log(f"Wake-word spotter ready ({len(det.templates)} templates, threshold {det.threshold:.2f})")
+            else: log(f"No wake-word templates in {WAKE_DIR} – using Whisper for wake words")
+        except Exception as e:
+            log(f"Wake-word spotter unavailable: {e}")
+
     # TTS init safely
     def _init_tts(self):
         import pyttsx3
         try:
-            eng=pyttsx3.init(); eng.setProperty('rate',165)
+            with profile.step("init pyttsx3"): eng=pyttsx3.init()
+            eng.setProperty('rate',165)
             vid=pick_child_voice(eng)
             if vid: eng.setProperty('voice',vid)
             self.tts_engine=eng; log("TTS ready")
         except Exception as e:
             log(f"TTS init error: {e}"); self.tts_engine=None
 
-    # Mic loop (only if audio ok)
+    # Mic loop (only if audio ok): reads 10 ms frames out of the ring the callback fills
     def _mic_loop(self):
-        frames,silence=[],0
+        ring,n=self.ring,int(self.rate/100)
+        pos=ring.written; start=last=None; silence=0; dropped=ring.dropped
         while self.audio:
-            try:
-                frame=self.stream.read(int(self.rate/100),exception_on_overflow=False)
-            except Exception as e:
-                log(f"Stream read error: {e}"); break
+            got=ring.wait(pos,n)
+            if got is None: continue
+            if ring.dropped!=dropped:
+                log(f"Mic loop fell behind, skipped {(ring.dropped-dropped)/self.rate:.2f}s")
+                dropped=ring.dropped; start=None; silence=0
+                if self.partial: self.partial.cancel(); self.partial=None
+            pos=got+n
+            frame=ring.read(got,pos)  # webrtcvad needs bytes; 320 B per frame
             speech=self.vad.is_speech(frame,self.rate) if self.vad else False
             if self.state=="SPEAK" and speech:
                 self._stop_speaking(interrupted=True)
-            if self.state in ("IDLE","LISTEN"):
-                if speech: frames.append(frame); silence=0
-                elif frames:
-                    silence+=1
-                    if silence>20:
-                        pcm=b"".join(frames); frames,silence=[],0
-                        threading.Thread(target=self._process_audio,args=(pcm,),daemon=True).start()
-            time.sleep(0.005)
-
-    def _process_audio(self,pcm):
+            if self.state not in ("IDLE","LISTEN"):
+                continue
+            if start is None:
+                if not speech: continue
+                start=got
+                if PARTIALS and self.state=="LISTEN" and self.whisper_model:
+                    from asr import PartialTranscriber
+                    self.partial=PartialTranscriber(self.whisper_model,self._show_partial,self.asr_lock)
+            if self.partial: self.partial.append(frame)
+            if speech: last=pos; silence=0
+            else: silence+=1
+            if silence>20 or pos-start>=MAX_UTTERANCE_S*self.rate:
+                pcm=ring.read(start,last); start=None; silence=0
+                partial,self.partial=self.partial,None
+                threading.Thread(target=self._process_audio,args=(pcm,partial),daemon=True).start()
+
+    def _show_partial(self,text):
+        log(f"Partial: {text}"); self.gui.set(caption=text)
+
+    def _process_audio(self,pcm,partial=None):
+        if self.state=="IDLE" and self.wake:
+            t=time.perf_counter(); score=self.wake.score(pcm)
+            log(f"Wake score {score:.2f}/{self.wake.threshold:.2f} ({(time.perf_counter()-t)*1000:.0f} ms)")
+            if score<=self.wake.threshold:
+                self.state="LISTEN"; self.gui.set(emotion="listen")
+            return
         if not self.whisper_model: return
-        with tempfile.NamedTemporaryFile(delete=False,suffix='.wav') as tmp:
-            with wave.open(tmp.name,'wb') as wf:
-                wf.setnchannels(1); import pyaudio; wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16)); wf.setframerate(self.rate); wf.writeframes(pcm)
-            path=tmp.name
-        text=self.whisper_model.transcribe(path)['text'].strip().lower(); log(f"Heard: {text}")
+        from asr import transcribe_pcm
+        t=time.perf_counter()
+        if partial:
+            text=partial.finish().lower(); reused=partial.committed_seconds
+        else:
+            with self.asr_lock: text=transcribe_pcm(self.whisper_model,pcm).lower()
+            reused=0
+        log(f"Heard: {text} (final pass {(time.perf_counter()-t)*1000:.0f} ms, "
+            f"{reused:.1f}s of {len(pcm)/2/self.rate:.1f}s already decoded)")
+        if partial: self.gui.set(caption=text)
         if self.state=="IDLE" and any(text.startswith(w) for w in WAKE_WORDS):
-            self.state="LISTEN"; self.gui.emotion="Listen"; self.gui.draw(); return
+            self.state="LISTEN"; self.gui.set(emotion="listen"); return
         if self.state=="LISTEN":
             self._respond(text)
 
     # Respond (no network in safe-mode)
     def _respond(self,user):
-        self.state="SPEAK"; self.gui.emotion="Think"; self.gui.draw()
+        self.state="SPEAK"; self.gui.set(emotion="think")
         reply="I heard you!"; log(f"Reply: {reply}")
-        if self.tts_engine:
-            self.gui.mouth_start(); self.stop_tts.clear()
-            threading.Thread(target=self._speak,args=(reply,),daemon=True).start()
+        if self.speech:
+            self.speech.say(reply,started_at=time.perf_counter())
         else:
-            self.state="IDLE"; self.gui.emotion="Happy"; self.gui.draw()
+            self.state="IDLE"; self._idle_face()
 
-    def _speak(self,txt):
-        try:
-            self.tts_engine.say(txt); self.tts_engine.runAndWait()
-        except Exception as e:
-            log(f"TTS runtime error: {e}")
-        self._stop_speaking()
+    def _on_playing(self,playing):
+        self.gui.set(talking=playing)
 
+    def _speech_done(self):
+        if self.state=="SPEAK":
+            self.state="IDLE"; self._idle_face()
+
+    # Barge-in (mic thread): audio stops within one chunk, the face catches up on its next tick
     def _stop_speaking(self,interrupted=False):
-        if self.tts_engine: self.tts_engine.stop()
-        self.gui.mouth_stop(); self.state="IDLE"; self.gui.emotion="Happy"; self.gui.draw()
+        if self.speech: self.speech.cancel()
+        self.state="IDLE"; self._idle_face()
         if interrupted: log("Speech interrupted by user")
 
+    def _idle_face(self):
+        self.gui.set(talking=False,caption="",emotion="happy")
+
     def _shutdown(self):
         log("Shutting down …"); os._exit(0)
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Wake-word spotting for the NeoMind kiosk
+A cheap always-on stage in front of Whisper. Each VAD utterance is reduced to
+MFCC features in NumPy and compared to a few enrolled recordings of the wake
+word with dynamic time warping. Whisper only runs once the wake word fires.
+
+Utterances much longer or shorter than every template (background chatter,
+TV) are rejected on their length alone, before any features are computed.
+
+Enroll a few samples of the child saying the wake word:
+    python gui/wakeword.py enroll [config/wake] [count]
+"""
+
+import glob
+import os
+import sys
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME = 400           # 25 ms
+HOP = 160             # 10 ms
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WAKE_DIR = os.environ.get('NEOMIND_WAKE_DIR', os.path.join(BASE_DIR, 'config', 'wake'))
+# Override for the threshold calibrated from the templates themselves
+WAKE_THRESHOLD = os.environ.get('NEOMIND_WAKE_THRESHOLD')
+# Calibrated threshold = margin x the largest distance between two templates
+THRESHOLD_MARGIN = 1.25
+
+
+def _mel_filterbank():
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    mels = np.linspace(hz_to_mel(20), hz_to_mel(SAMPLE_RATE / 2), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * 700 * (10 ** (mels / 2595) - 1) / SAMPLE_RATE).astype(int)
+    bank = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+    for m in range(1, N_MELS + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        bank[m - 1, left:center] = (np.arange(left, center) - left) / max(1, center - left)
+        bank[m - 1, center:right] = (right - np.arange(center, right)) / max(1, right - center)
+    return bank
+
+
+def _dct_matrix():
+    n = np.arange(N_MELS)
+    k = np.arange(N_MFCC)[:, None]
+    dct = np.cos(np.pi / N_MELS * (n + 0.5) * k) * np.sqrt(2 / N_MELS)
+    dct[0] /= np.sqrt(2)
+    return dct.astype(np.float32)
+
+
+MEL_BANK = _mel_filterbank()
+DCT = _dct_matrix()
+WINDOW = np.hamming(FRAME).astype(np.float32)
+
+
+def mfcc(samples):
+    """float32 samples at 16 kHz -> (frames, N_MFCC) with cepstral mean removed"""
+    if len(samples) < FRAME:
+        samples = np.pad(samples, (0, FRAME - len(samples)))
+    emphasized = np.empty_like(samples)
+    emphasized[0] = samples[0]
+    emphasized[1:] = samples[1:] - 0.97 * samples[:-1]
+    frames = np.lib.stride_tricks.sliding_window_view(emphasized, FRAME)[::HOP] * WINDOW
+    power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2 / N_FFT
+    features = np.log(power @ MEL_BANK.T + 1e-10) @ DCT.T
+    features -= features.mean(axis=0)
+    return features
+
+
+def dtw_distance(a, b):
+    """Length-normalised DTW distance between two feature sequences"""
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1))
+    n, m = cost.shape
+    inf = float('inf')
+    previous = [0.0] + [inf] * m
+    for i in range(n):
+        # Plain floats: the recurrence along a row can't be vectorised
+        row_cost = cost[i].tolist()
+        row = [inf] * (m + 1)
+        for j in range(1, m + 1):
+            row[j] = row_cost[j - 1] + min(previous[j - 1], previous[j], row[j - 1])
+        previous = row
+    return previous[m] / (n + m)
+
+
+def read_wav(path):
+    """16 kHz mono int16 WAV -> int16 PCM bytes"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit")
+        return wf.readframes(wf.getnframes())
+
+
+def write_wav(path, pcm):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm)
+
+
+def _features(pcm):
+    return mfcc(np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768)
+
+
+class WakeWordDetector:
+    """Template/DTW keyword spotter over whole VAD utterances"""
+
+    def __init__(self, templates, threshold=None, max_length_ratio=1.8):
+        self.templates = [_features(pcm) for pcm in templates]
+        self.template_samples = [len(pcm) // 2 for pcm in templates]
+        self.max_length_ratio = max_length_ratio
+        if threshold is None and WAKE_THRESHOLD:
+            threshold = float(WAKE_THRESHOLD)
+        if threshold is None:
+            threshold = self._calibrate()
+        self.threshold = threshold
+
+    @classmethod
+    def from_dir(cls, path=WAKE_DIR, **options):
+        return cls([read_wav(wav) for wav in sorted(glob.glob(os.path.join(path, '*.wav')))],
+                   **options)
+
+    @property
+    def ready(self):
+        """At least two templates and a threshold"""
+        return len(self.templates) >= 2 and self.threshold is not None
+
+    def _calibrate(self):
+        if len(self.templates) < 2:
+            return None
+        spread = max(dtw_distance(a, b) for i, a in enumerate(self.templates)
+                     for b in self.templates[i + 1:])
+        return spread * THRESHOLD_MARGIN
+
+    def score(self, pcm):
+        """Smallest DTW distance to a template of similar length (inf if none)"""
+        samples = len(pcm) // 2
+        candidates = [features for features, length in zip(self.templates, self.template_samples)
+                      if length / self.max_length_ratio <= samples <= length * self.max_length_ratio]
+        if not candidates:
+            return float('inf')
+        features = _features(pcm)
+        return min(dtw_distance(features, template) for template in candidates)
+
+    def detect(self, pcm):
+        return self.ready and self.score(pcm) <= self.threshold
+
+
+def enroll(path=WAKE_DIR, count=4):
+    """Record `count` wake-word samples from the mic into `path`"""
+    import pyaudio
+    from asr import Endpointer, capture_utterance
+
+    os.makedirs(path, exist_ok=True)
+    audio = pyaudio.PyAudio()
+    endpointer = Endpointer()
+    stream = audio.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                        frames_per_buffer=endpointer.frame_samples)
+    taken = len(glob.glob(os.path.join(path, '*.wav')))
+    try:
+        for n in range(count):
+            print(f"🎤 Say the wake word ({n + 1}/{count})…")
+            utterance = capture_utterance(stream, endpointer, lambda: True)
+            if not utterance:
+                print("⚠️ Nothing heard, try again")
+                continue
+            target = os.path.join(path, f"wake_{taken + n:02d}.wav")
+            write_wav(target, utterance.pcm)
+            print(f"✅ Saved {target} ({len(utterance.pcm) / 2 / SAMPLE_RATE:.2f}s)")
+    finally:
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+
+    detector = WakeWordDetector.from_dir(path)
+    if detector.ready:
+        print(f"Calibrated threshold: {detector.threshold:.2f}")
+    else:
+        print("⚠️ Enroll at least two samples")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'enroll':
+        sys.exit(__doc__)
+    enroll(sys.argv[2] if len(sys.argv) > 2 else WAKE_DIR,
+           int(sys.argv[3]) if len(sys.argv) > 3 else 4)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Batch chat: answer many messages in one request
+Regression replays of recorded sessions used to cost one HTTP round trip per
+message. POST /chat/batch takes a JSON array of {child_name, message} items,
+or NDJSON read as it arrives. Each child's messages are answered one at a
+time in input order, because every answer depends on that child's earlier
+turns. Different children are answered in parallel on a small thread pool,
+and each result is streamed back as soon as it is ready.
+
+Run this file to replay a JSONL file without a server, or against one with --url:
+    python batch.py sessions.jsonl > results.jsonl
+    python batch.py sessions.jsonl --url http://localhost:5000
+    python batch.py requests.jsonl --message-field body --child ana
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8          # children answered at once
+MAX_PENDING = 256        # items read ahead of the answers; reading pauses beyond this
+
+logger = logging.getLogger(__name__)
+
+
+def iter_ndjson(lines):
+    """Decode JSON lines (str or bytes), skipping blank ones
+
+    A line that isn't valid JSON comes out as a ValueError, so it gets its
+    own error result instead of ending the batch.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"line {number}: {e}")
+
+
+def parse_item(item):
+    """Return (child_name, message) or raise ValueError"""
+    if isinstance(item, Exception):
+        raise item
+    if not isinstance(item, dict):
+        raise ValueError(f"expected an object with child_name and message, got {item!r:.60}")
+    message = item.get('message')
+    child_name = item.get('child_name', 'friend')
+    if not isinstance(message, str) or not isinstance(child_name, str):
+        raise ValueError("message and child_name must be strings")
+    return child_name, message
+
+
+def run_batch(items, handle, workers=MAX_WORKERS, max_pending=MAX_PENDING):
+    """Yield one result per item as it finishes, then a summary
+
+    handle(child_name, message) returns the response dict. Results carry the
+    item's input index and its 'id' (or 'request_id'), because they come back
+    in completion order. Items are read on a separate thread, so a streamed
+    request body is answered while it is still arriving.
+    """
+    started = time.perf_counter()
+    results = queue.SimpleQueue()
+    lanes = {}                       # child_name -> deque of (index, item) not yet answered
+    lock = threading.Lock()
+    slots = threading.Semaphore(max_pending)
+    stopped = threading.Event()
+    pool = ThreadPoolExecutor(max(1, workers), thread_name_prefix='batch')
+    read = [0]
+
+    def answer(index, item):
+        result = {'index': index}
+        if isinstance(item, dict):
+            ident = item.get('id', item.get('request_id'))
+            if ident is not None:
+                result['id'] = ident
+        try:
+            child_name, message = parse_item(item)
+        except ValueError as e:
+            result['error'] = str(e)
+            return result
+        turn_started = time.perf_counter()
+        try:
+            result.update(handle(child_name, message))
+        except Exception as e:
+            logger.error(f"Batch error for {child_name}: {e}")
+            result.update(child_name=child_name, error='Internal server error')
+        result['elapsed_ms'] = round((time.perf_counter() - turn_started) * 1000, 2)
+        return result
+
+    def drain(child_name):
+        """Answer one child's queued items in order until its lane is empty"""
+        while not stopped.is_set():
+            with lock:
+                lane = lanes[child_name]
+                if not lane:
+                    del lanes[child_name]
+                    return
+                index, item = lane.popleft()
+            results.put(answer(index, item))
+            slots.release()
+
+    def feed():
+        try:
+            for index, item in enumerate(items):
+                while not slots.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                if stopped.is_set():
+                    return
+                read[0] += 1
+                try:
+                    child_name = parse_item(item)[0]
+                except ValueError:
+                    results.put(answer(index, item))
+                    slots.release()
+                    continue
+                with lock:
+                    lane = lanes.get(child_name)
+                    if lane is None:
+                        lanes[child_name] = deque([(index, item)])
+                        pool.submit(drain, child_name)
+                    else:
+                        lane.append((index, item))
+        except Exception as e:
+            results.put({'index': read[0], 'error': f"reading input failed: {e}"})
+            read[0] += 1
+        finally:
+            results.put(None)
+
+    feeder = threading.Thread(target=feed, name='batch-feed', daemon=True)
+    feeder.start()
+    done, errors, children, finished = 0, 0, set(), False
+    try:
+        while not finished or done < read[0]:
+            result = results.get()
+            if result is None:
+                finished = True
+                continue
+            done += 1
+            errors += 'error' in result
+            if 'child_name' in result:
+                children.add(result['child_name'])
+            yield result
+    finally:
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    yield {'done': True, 'items': done, 'errors': errors, 'children': len(children),
+           'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+# ---------- Command line ----------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replay a JSONL file of chat messages and write NDJSON results')
+    parser.add_argument('input', help="JSONL file, or - for stdin")
+    parser.add_argument('-o', '--output', help='results file (default: stdout)')
+    parser.add_argument('--url', help='POST to this server\'s /chat/batch instead of '
+                                      'answering in-process')
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('NEOMIND_BATCH_WORKERS', MAX_WORKERS)))
+    parser.add_argument('--child-field', default='child_name')
+    parser.add_argument('--message-field', default='message')
+    parser.add_argument('--child', default='friend',
+                        help='child_name for lines without the child field')
+    parser.add_argument('--store', default='memory', choices=('memory', 'sqlite'),
+                        help='in-process store; memory leaves data/conversations.db alone')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the response cache')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every turn')
+    return parser.parse_args(argv)
+
+
+def remap(items, args):
+    """Rename --child-field / --message-field to child_name / message"""
+    for item in items:
+        if isinstance(item, dict):
+            item = dict(item, child_name=item.get(args.child_field, args.child),
+                        message=item.get(args.message_field))
+        yield item
+
+
+def run_local(items, args):
+    os.environ['NEOMIND_STORE'] = args.store
+    import neomind_server
+    if not args.verbose:
+        logging.getLogger('neomind.turns').setLevel(logging.WARNING)
+
+    def handle(child_name, message):
+        payload, cache_status = neomind_server.chat_turn(child_name, message, args.no_cache)
+        return dict(payload, cache=cache_status)
+
+    try:
+        yield from run_batch(items, handle, args.workers)
+    finally:
+        neomind_server.store.close()
+
+
+def run_remote(items, args):
+    try:
+        import requests
+    except ImportError:
+        sys.exit("❌ --url needs requests: pip install requests")
+
+    # Undecodable lines go as their error text, so the server's indexes still match the file
+    body = (json.dumps(str(item) if isinstance(item, Exception) else item).encode('utf-8') + b'\n'
+            for item in items)
+    headers = {'Content-Type': 'application/x-ndjson'}
+    if args.no_cache:
+        headers['X-NeoMind-Cache'] = 'bypass'
+    with requests.post(f"{args.url.rstrip('/')}/chat/batch", data=body, headers=headers,
+                       params={'workers': args.workers}, stream=True) as reply:
+        reply.raise_for_status()
+        for line in reply.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    items = remap(iter_ndjson(source), args)
+    run = run_remote if args.url else run_local
+    try:
+        for result in run(items, args):
+            if result.get('done'):
+                print(f"✅ {result['items']} messages from {result['children']} children in "
+                      f"{result['elapsed_ms'] / 1000:.2f} s, {result['errors']} errors",
+                      file=sys.stderr)
+            else:
+                output.write(json.dumps(result) + '\n')
+    finally:
+        for stream in (source, output):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Emotion for Neo's responses
+The lexicon is compiled once into a phrase -> (emotion, weight) map and a
+single alternation regex, so a response is scored in one pass. The server
+classifies each response once and returns the emotion name with it; the
+GUIs only look the name up in their own table of colours and face shapes.
+"""
+
+import re
+
+# (emotion, weight, phrases) in priority order; ties go to the earlier emotion
+LEXICON = (
+    ('excited', 1.0, ('great', 'awesome', 'amazing', 'wonderful', 'fantastic', 'wow')),
+    ('confused', 1.0, ('confused', 'sorry', 'not sure', "don't know", 'hmm')),
+)
+
+DEFAULT_EMOTION = 'happy'
+EMOTIONS = (DEFAULT_EMOTION,) + tuple(name for name, _, _ in LEXICON)
+
+
+class EmotionClassifier:
+    """Score a response against the lexicon in a single regex pass"""
+
+    def __init__(self, lexicon=LEXICON, default=DEFAULT_EMOTION):
+        self.default = default
+        self.names = [name for name, _, _ in lexicon]
+        self._phrases = {}   # phrase -> (rank, weight)
+        for rank, (_, weight, phrases) in enumerate(lexicon):
+            for phrase in phrases:
+                self._phrases.setdefault(phrase.lower(), (rank, weight))
+        # Longest first so 'not sure' wins over any shorter phrase inside it
+        alternation = '|'.join(re.escape(phrase) for phrase in
+                               sorted(self._phrases, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b(?:{alternation})\b")
+
+    def classify(self, text):
+        """Return (emotion, confidence): the best-scoring emotion and its share of the score"""
+        phrases = self._phrases
+        scores = [0.0] * len(self.names)
+        for phrase in self._pattern.findall(text.lower()):
+            rank, weight = phrases[phrase]
+            scores[rank] += weight
+        total = sum(scores)
+        if not total:
+            return self.default, 0.0
+        best = max(range(len(scores)), key=lambda rank: (scores[rank], -rank))
+        return self.names[best], scores[best] / total
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Keyword intent matcher for the fallback responder
+The intent table is compiled once into a keyword -> intent map; a message is
+tokenized into whole words in one regex pass and each word is a single dict
+lookup, so 'hi' no longer matches 'this' and 'what' no longer matches
+'whatever'.
+"""
+
+import re
+
+# (intent, keywords, response template) in priority order
+INTENTS = (
+    ('greeting', ('hello', 'hi', 'hey'),
+     "Hello {child_name}! How are you doing today? What would you like to learn about?"),
+    ('question', ('what', 'how', 'why', 'when', 'where'),
+     "That's a great question, {child_name}! Let me think about that. What specifically interests you about this topic?"),
+    ('math', ('math', 'numbers', 'calculate'),
+     "I love math, {child_name}! Math is like solving fun puzzles. What math problem are you working on?"),
+    ('science', ('science', 'experiment', 'discovery'),
+     "Science is amazing, {child_name}! There's so much to discover. What scientific concept fascinates you?"),
+    ('art', ('art', 'draw', 'create', 'paint'),
+     "Art is wonderful for expressing creativity, {child_name}! What kind of art project are you thinking about?"),
+    ('story', ('story', 'book', 'read'),
+     "I love stories too, {child_name}! Stories help us learn about the world. What's your favorite type of story?"),
+    ('game', ('game', 'play', 'fun'),
+     "Playing and learning go great together, {child_name}! What kind of games do you enjoy?"),
+)
+
+FALLBACK_INTENT = 'chat'
+FALLBACK_RESPONSE = "That's interesting, {child_name}! Tell me more about what you're thinking. I'm here to learn and explore with you!"
+
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class IntentMatcher:
+    """Classify messages against an intent table in a single pass"""
+
+    def __init__(self, intents=INTENTS):
+        self.names = [name for name, _, _ in intents]
+        self.responses = {name: template for name, _, template in intents}
+        self.responses[FALLBACK_INTENT] = FALLBACK_RESPONSE
+        # keyword -> rank of the first (highest priority) intent listing it
+        self._keywords = {}
+        for rank, (_, keywords, _) in enumerate(intents):
+            for keyword in keywords:
+                self._keywords.setdefault(keyword.lower(), rank)
+
+    def classify(self, message):
+        """Return (intent, confidence)
+
+        The highest-priority intent with a keyword hit wins; confidence is its
+        share of all keyword hits in the message.
+        """
+        keywords = self._keywords
+        hits = [keywords[word] for word in WORD_RE.findall(message.lower()) if word in keywords]
+        if not hits:
+            return FALLBACK_INTENT, 0.0
+        best = min(hits)
+        return self.names[best], hits.count(best) / len(hits)
+
+    def respond(self, message, child_name):
+        """Return (response, intent, confidence)"""
+        intent, confidence = self.classify(message)
+        return self.responses[intent].format(child_name=child_name), intent, confidence
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Per-child inverted index for NeoMind memory search
+Postings are appended incrementally as turns are stored and ranked with BM25
+"""
+
+import heapq
+import math
+import re
+import sys
+import threading
+from array import array
+from operator import itemgetter
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Words too common to say anything about a memory
+STOPWORDS = frozenset("""
+a an and are as at be but by do for from has have i i'm in is it it's me my
+of on or so that the this to was we what you your
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Postings scanned per query term, newest first. Keeps very common terms
+# (low idf anyway) from turning a lookup into a full history scan.
+SCAN_LIMIT = 1024
+
+# Rough cost of a new term: key string aside, dict slot, tuple and two arrays
+TERM_OVERHEAD = 240
+
+# A posting packs the term frequency and the turn length into one int:
+# tf << LENGTH_BITS | length. Lengths past the mask are clamped.
+LENGTH_BITS = 16
+LENGTH_MASK = (1 << LENGTH_BITS) - 1
+
+
+def tokenize(text):
+    """Lowercase word tokens of a message"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class ChildIndex:
+    """Inverted index over one child's turns
+
+    Each posting stores the raw term frequency and turn length. Length
+    normalisation uses the average turn length at query time, so identical
+    turns score the same however early they were added. A query weighs each
+    distinct (tf, length) pair once; most postings share a handful of them.
+    """
+
+    def __init__(self):
+        self._ids = array('q')       # ordinal -> external turn id
+        self._postings = {}          # term -> (ordinals, packed tf and length)
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self.nbytes = 0              # approximate resident size
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, turn_id, text):
+        """Index one turn"""
+        tokens = tokenize(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        with self._lock:
+            ordinal = len(self._ids)
+            self._ids.append(turn_id)
+            self._total_length += len(tokens)
+            length = min(len(tokens), LENGTH_MASK)
+            self.nbytes += 8 + 8 * len(counts)
+            for term, tf in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = (array('I'), array('I'))
+                    self.nbytes += sys.getsizeof(term) + TERM_OVERHEAD
+                posting[0].append(ordinal)
+                posting[1].append(min(tf, LENGTH_MASK) << LENGTH_BITS | length)
+
+    def search(self, query, limit=5):
+        """Return up to `limit` (turn_id, score) pairs, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        terms = (terms - STOPWORDS) or terms
+
+        with self._lock:
+            n_docs = len(self._ids)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            base = K1 * (1.0 - B)
+            per_token = K1 * B / avg_length
+            scores = {}
+            get = scores.get
+
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                ordinals, packed = posting
+                df = len(ordinals)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                start = max(0, df - SCAN_LIMIT)
+                packed = packed[start:]
+                weights = {}
+                for key in set(packed):
+                    tf = key >> LENGTH_BITS
+                    norm = base + per_token * (key & LENGTH_MASK)
+                    weights[key] = idf * tf * (K1 + 1.0) / (tf + norm)
+                pairs = zip(ordinals[start:], map(weights.__getitem__, packed))
+                if not scores:
+                    scores.update(pairs)
+                    continue
+                for ordinal, weight in pairs:
+                    scores[ordinal] = get(ordinal, 0.0) + weight
+
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return [(self._ids[ordinal], score) for ordinal, score in best]
+
+
+class MemoryIndex:
+    """Inverted indexes for every child, created on first use"""
+
+    def __init__(self):
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def child(self, child_name):
+        index = self._children.get(child_name)
+        if index is None:
+            with self._lock:
+                index = self._children.setdefault(child_name, ChildIndex())
+        return index
+
+    def add(self, child_name, turn_id, text):
+        self.child(child_name).add(turn_id, text)
+
+    def search(self, child_name, query, limit=5):
+        index = self._children.get(child_name)
+        if index is None:
+            return []
+        return index.search(query, limit)
@@ -4,12 +4,25 @@ Sample NeoMind Knowledge Graph Server
 This is a simple version - replace with your full Graphiti server
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+import atexit
+import json
 import logging
 import os
+import re
+import signal
+import sys
+import time
 from datetime import datetime
 
+from batch import iter_ndjson, run_batch
+from emotions import EmotionClassifier
+from intents import IntentMatcher
+from response_cache import ResponseCache
+from storage import open_store
+from turns import Speaker
+
 app = Flask(__name__)
 CORS(app)
 
@@ -17,8 +30,55 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Simple in-memory storage (replace with your Graphiti implementation)
-conversations = {}
+# Conversation storage (replace with your Graphiti implementation)
+# NEOMIND_STORE=sqlite (default, survives restarts) or memory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+store = open_store(
+    os.environ.get('NEOMIND_STORE', 'sqlite'),
+    os.environ.get('NEOMIND_DB', os.path.join(BASE_DIR, 'data', 'conversations.db')),
+    hot_turns=int(os.environ.get('NEOMIND_HOT_TURNS', 200)),
+    memory_budget=int(float(os.environ.get('NEOMIND_MEMORY_BUDGET_MB', 64)) * 1024 * 1024)
+)
+# Closing drains the write-behind queue, so every accepted turn is stored
+atexit.register(store.close)
+# Summarizers can subscribe to turns leaving the hot window:
+# store.add_spill_hook(lambda child_name, turns: ...)
+
+# Turns are logged by the store's writer once they are stored, not by the handlers
+turn_logger = logging.getLogger('neomind.turns')
+
+def log_turns(records):
+    """Commit hook: one log line per stored turn"""
+    if not turn_logger.isEnabledFor(logging.INFO):
+        return
+    for child_name, _, speaker, message in records:
+        if speaker == Speaker.USER:
+            turn_logger.info("📨 Message from %s: %s", child_name, message)
+        else:
+            turn_logger.info("🤖 Neo responded to %s: %.50s...", child_name, message)
+
+store.add_commit_hook(log_turns)
+
+# Keyword intents for the fallback responder, compiled once
+intent_matcher = IntentMatcher()
+# Emotion is picked once per response here; clients just look it up
+emotion_classifier = EmotionClassifier()
+
+# Repeated messages skip the responder; keyed on the child's last few turns too
+# NEOMIND_RESPONSE_CACHE=0 turns it off (per worker process)
+response_cache = None
+if os.environ.get('NEOMIND_RESPONSE_CACHE', '1') != '0':
+    response_cache = ResponseCache(
+        max_entries=int(os.environ.get('NEOMIND_RESPONSE_CACHE_SIZE', 1024)),
+        ttl=float(os.environ.get('NEOMIND_RESPONSE_CACHE_TTL', 300))
+    )
+    # Messages a child hasn't said before invalidate their entries by
+    # themselves; anything else that writes memories (a summarizer on the
+    # spill hook, Graphiti ingestion) must call response_cache.invalidate(child_name)
+CACHE_CONTEXT_TURNS = int(os.environ.get('NEOMIND_RESPONSE_CACHE_CONTEXT', 2))
+
+# Children answered at once by one /chat/batch request
+BATCH_WORKERS = int(os.environ.get('NEOMIND_BATCH_WORKERS', 8))
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -37,87 +97,173 @@ def chat_text():
         message = data.get('message', '')
         child_name = data.get('child_name', 'friend')
         
-        logger.info(f"📨 Message from {child_name}: {message}")
-        
-        # Store conversation
-        if child_name not in conversations:
-            conversations[child_name] = []
-        
-        conversations[child_name].append({
-            'timestamp': datetime.now().isoformat(),
-            'message': message,
-            'type': 'user'
-        })
-        
-        # Generate simple response (replace with your Graphiti logic)
-        response = generate_simple_response(message, child_name)
-        
-        conversations[child_name].append({
-            'timestamp': datetime.now().isoformat(),
-            'message': response,
-            'type': 'neo'
-        })
+        payload, cache_status = chat_turn(child_name, message, bypass=cache_bypass_requested())
         
-        logger.info(f"🤖 Neo responded to {child_name}: {response[:50]}...")
-        
-        return jsonify({
-            'response': response,
-            'child_name': child_name,
-            'conversation_count': len(conversations[child_name]),
-            'memories_used': 1  # Mock value
-        })
+        reply = jsonify(payload)
+        reply.headers['X-NeoMind-Cache'] = cache_status
+        return reply
         
     except Exception as e:
         logger.error(f"Chat error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-def generate_simple_response(message, child_name):
-    """Generate a simple response (replace with your Graphiti implementation)"""
-    message_lower = message.lower()
-    
-    # Simple keyword-based responses
-    if any(word in message_lower for word in ['hello', 'hi', 'hey']):
-        return f"Hello {child_name}! How are you doing today? What would you like to learn about?"
+def chat_turn(child_name, message, bypass=False):
+    """Store a message, answer it and store the answer; return (payload, cache status)
+
+    Needs no request context, so /chat/batch can run it on worker threads.
+    """
+    key, generation, cached, cache_status = cache_lookup(child_name, message, bypass)
     
-    elif any(word in message_lower for word in ['what', 'how', 'why', 'when', 'where']):
-        return f"That's a great question, {child_name}! Let me think about that. What specifically interests you about this topic?"
+    # Store conversation
+    store.append(child_name, message, Speaker.USER)
     
-    elif any(word in message_lower for word in ['math', 'numbers', 'calculate']):
-        return f"I love math, {child_name}! Math is like solving fun puzzles. What math problem are you working on?"
+    if cached:
+        response, emotion = cached
+    else:
+        # Generate simple response (replace with your Graphiti logic)
+        response = generate_simple_response(message, child_name)
+        emotion = emotion_classifier.classify(response)[0]
+        if cache_status == 'miss':
+            response_cache.put(key, (response, emotion), generation)
     
-    elif any(word in message_lower for word in ['science', 'experiment', 'discovery']):
-        return f"Science is amazing, {child_name}! There's so much to discover. What scientific concept fascinates you?"
+    store.append(child_name, response, Speaker.NEO)
     
-    elif any(word in message_lower for word in ['art', 'draw', 'create', 'paint']):
-        return f"Art is wonderful for expressing creativity, {child_name}! What kind of art project are you thinking about?"
+    return {
+        'response': response,
+        'emotion': emotion,
+        'child_name': child_name,
+        'conversation_count': store.count(child_name),
+        'memories_used': 1  # Mock value
+    }, cache_status
+
+def cache_bypass_requested():
+    """X-NeoMind-Cache: bypass or Cache-Control: no-cache on the current request"""
+    return (request.headers.get('X-NeoMind-Cache', '').lower() == 'bypass'
+            or 'no-cache' in request.headers.get('Cache-Control', '').lower())
+
+def cache_lookup(child_name, message, bypass=False):
+    """Return (key, generation, cached (response, emotion) or None, status)
+
+    status is 'hit', 'miss', 'bypass' or 'off'. Call before storing the
+    message, so the context is the turns that came before it.
+    """
+    if response_cache is None:
+        return None, None, None, 'off'
+    response_cache.observe(child_name, message)
+    if bypass:
+        response_cache.bypass(child_name)
+        return None, None, None, 'bypass'
+    # Includes turns still queued for the writer, so a quick repeat sees them
+    context = [turn.message for turn in store.recent(child_name, CACHE_CONTEXT_TURNS)]
+    key = response_cache.key(child_name, message, context)
+    generation = response_cache.generation(child_name)
+    cached = response_cache.get(key)
+    return key, generation, cached, 'hit' if cached else 'miss'
+
+def generate_simple_response(message, child_name):
+    """Generate a simple response (replace with your Graphiti implementation)"""
+    response, _, _ = intent_matcher.respond(message, child_name)
+    return response
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def generate_response_chunks(message, child_name):
+    """Yield the response a sentence at a time (replace with a streaming backend)"""
+    yield from SENTENCE_END.split(generate_simple_response(message, child_name))
+
+def sse_event(event, payload):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the response as Server-Sent Events: chunk..., then done"""
+    started = time.perf_counter()
+    data = request.get_json() or {}
+    message = data.get('message', '')
+    child_name = data.get('child_name', 'friend')
     
-    elif any(word in message_lower for word in ['story', 'book', 'read']):
-        return f"I love stories too, {child_name}! Stories help us learn about the world. What's your favorite type of story?"
+    key, generation, cached, cache_status = cache_lookup(child_name, message,
+                                                         cache_bypass_requested())
     
-    elif any(word in message_lower for word in ['game', 'play', 'fun']):
-        return f"Playing and learning go great together, {child_name}! What kind of games do you enjoy?"
+    def events():
+        try:
+            store.append(child_name, message, Speaker.USER)
+            
+            chunks = []
+            source = (SENTENCE_END.split(cached[0]) if cached
+                      else generate_response_chunks(message, child_name))
+            for chunk in source:
+                if not chunks:
+                    logger.info(f"⏱️ First chunk for {child_name} after "
+                                f"{(time.perf_counter() - started) * 1000:.1f} ms")
+                chunks.append(chunk)
+                yield sse_event('chunk', {'text': chunk})
+            
+            response = ' '.join(chunks)
+            if cached:
+                emotion = cached[1]
+            else:
+                emotion = emotion_classifier.classify(response)[0]
+                if cache_status == 'miss':
+                    response_cache.put(key, (response, emotion), generation)
+            store.append(child_name, response, Speaker.NEO)
+            
+            yield sse_event('done', {
+                'response': response,
+                'emotion': emotion,
+                'child_name': child_name,
+                'conversation_count': store.count(child_name),
+                'memories_used': 1  # Mock value
+            })
+        except Exception as e:
+            logger.error(f"Stream error: {e}")
+            yield sse_event('error', {'error': 'Internal server error'})
     
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                             'X-NeoMind-Cache': cache_status})
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer many messages, streamed back as NDJSON in completion order
+
+    The body is a JSON array of {child_name, message} items, or NDJSON
+    (one item per line) which is answered while it is still arriving.
+    """
+    bypass = cache_bypass_requested()
+    workers = min(max(request.args.get('workers', BATCH_WORKERS, type=int), 1), BATCH_WORKERS)
+    if request.mimetype == 'application/json':
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({'error': 'Expected a JSON array of {child_name, message} items'}), 400
     else:
-        return f"That's interesting, {child_name}! Tell me more about what you're thinking. I'm here to learn and explore with you!"
+        items = iter_ndjson(request.stream)
+    
+    def handle(child_name, message):
+        payload, cache_status = chat_turn(child_name, message, bypass)
+        return dict(payload, cache=cache_status)
+    
+    lines = (json.dumps(result) + '\n' for result in run_batch(items, handle, workers))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
 
 @app.route('/memories/search', methods=['POST'])
 def search_memories():
-    """Search memories (mock implementation)"""
+    """Search memories with BM25 over the child's full history"""
     try:
         data = request.get_json()
         query = data.get('query', '')
         child_name = data.get('child_name', 'friend')
+        limit = int(data.get('limit', 5))
         
-        # Mock memory search
         memories = []
-        if child_name in conversations:
-            for conv in conversations[child_name][-5:]:  # Last 5 conversations
-                if query.lower() in conv['message'].lower():
-                    memories.append({
-                        'fact': conv['message'],
-                        'timestamp': conv['timestamp'],
-                        'relevance': 0.8
-                    })
+        for turn, score in store.search(child_name, query, limit):
+            memories.append({
+                'fact': turn.message,
+                'timestamp': turn.timestamp,
+                'relevance': round(score, 4)
+            })
         
         return jsonify({
             'query': query,
@@ -130,6 +276,44 @@ def search_memories():
         logger.error(f"Memory search error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/chat/history', methods=['GET'])
+def chat_history():
+    """Page through a child's conversation, newest page first"""
+    try:
+        child_name = request.args.get('child_name', 'friend')
+        before = request.args.get('before', type=int)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        
+        turns = [dict(turn.to_dict(), seq=seq)
+                 for seq, turn in store.history(child_name, before, limit)]
+        
+        return jsonify({
+            'child_name': child_name,
+            'turns': turns,
+            'has_more': bool(turns) and turns[0]['seq'] > 1
+        })
+        
+    except Exception as e:
+        logger.error(f"History error: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/stats/memory', methods=['GET'])
+def memory_stats():
+    """Bytes held in each storage tier"""
+    return jsonify(store.memory_stats())
+
+@app.route('/stats/writes', methods=['GET'])
+def write_stats():
+    """Write-behind queue depth and flush latency (this worker process)"""
+    return jsonify(store.write_stats())
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    """Response cache hit rate and size (this worker process)"""
+    if response_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(response_cache.stats(), enabled=True))
+
 if __name__ == '__main__':
     print("""
     🧠 NeoMind Knowledge Server (Sample)
@@ -141,8 +325,29 @@ if __name__ == '__main__':
     Endpoints:
     - GET  /health         - Health check
     - POST /chat/text      - Text chat
+    - POST /chat/stream    - Text chat, streamed as Server-Sent Events
+    - POST /chat/batch     - Many messages in one request, results as NDJSON
+    - GET  /chat/history   - Page through a child's conversation
     - POST /memories/search - Memory search
+    - GET  /stats/memory   - Storage tier sizes
+    - GET  /stats/cache    - Response cache hit rate
+    - GET  /stats/writes   - Write queue depth and flush latency
     """)
     
-    port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    from serving import parse_args, run_prefork
+    args = parse_args()
+    
+    if args.mode == 'dev':
+        # SIGTERM exits through atexit, so queued turns are flushed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        app.run(host=args.host, port=args.port, debug=True)
+    else:
+        if os.environ.get('NEOMIND_STORE', 'sqlite') == 'memory' and args.workers > 1:
+            sys.exit("❌ NEOMIND_STORE=memory is per-process; use sqlite or --workers 1")
+        
+        # Workers import the app and open their own store after the fork
+        store.close()
+        logger.info(f"🚀 Serving with {args.workers} workers x {args.threads} threads "
+                    f"on {args.host}:{args.port}")
+        run_prefork('neomind_server:app', args,
+                    on_worker_exit=lambda: sys.modules['neomind_server'].store.close())
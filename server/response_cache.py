@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Response cache in front of the chat backend
+Children repeat themselves ("hi", "hello", "what's that") and each repeat
+used to go all the way through the responder, which with a real knowledge
+graph is a slow query. Responses are cached by (child, normalized message,
+hash of the child's last few turns) in an LRU with a TTL. The recent turns
+keep "what's that" from being answered out of context.
+
+Each child also has a generation number, and entries only match their own
+generation. It moves when the child's memories may have changed: observe()
+bumps it for a message the child hasn't said before, since that may carry a
+new memory ("my dog is called Biscuit"), and invalidate() bumps it for
+memories written elsewhere. Repeats ("hi" again) leave it alone, so a
+personalized answer never outlives the memories it was built from, while
+greetings and other repeats keep hitting.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from memory_index import tokenize
+
+
+def normalize(message):
+    """'What's  THAT?' -> "what's that" """
+    return ' '.join(tokenize(message))
+
+
+class ResponseCache:
+    """Thread-safe LRU of responses with a TTL and per-child invalidation"""
+
+    def __init__(self, max_entries=1024, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()    # key -> (expires, generation, value), oldest first
+        self._generations = {}           # child_name -> bumped by observe() / invalidate()
+        self._seen = OrderedDict()       # (child_name, normalized message) already said, LRU
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypasses': 0, 'expired': 0,
+                       'invalidated': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(child_name, message, context=()):
+        """context: the recent turns the response may depend on, oldest first"""
+        digest = hashlib.blake2b('\0'.join(context).encode('utf-8'), digest_size=8).hexdigest()
+        return child_name, normalize(message), digest
+
+    def generation(self, child_name):
+        """Read before generating a response; pass to put() so a memory
+        written meanwhile invalidates it"""
+        with self._lock:
+            return self._generations.get(child_name, 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires, generation, value = entry
+            if expires <= self._clock():
+                reason = 'expired'
+            elif generation != self._generations.get(key[0], 0):
+                reason = 'invalidated'
+            else:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return value
+            del self._entries[key]
+            self._stats[reason] += 1
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, value, generation):
+        """Cache a response unless the child's memories changed while it was generated"""
+        with self._lock:
+            if generation != self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (self._clock() + self.ttl, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def observe(self, child_name, message):
+        """A message from the child, cached or not; one not said before may carry a memory"""
+        seen = (child_name, normalize(message))
+        with self._lock:
+            if seen in self._seen:
+                self._seen.move_to_end(seen)
+                return
+            # Forgetting a message only costs an extra invalidation later
+            self._seen[seen] = None
+            if len(self._seen) > self.max_entries * 4:
+                self._seen.popitem(last=False)
+            self._bump(child_name)
+
+    def bypass(self, child_name):
+        """A message that skipped the cache"""
+        with self._lock:
+            self._stats['bypasses'] += 1
+
+    def invalidate(self, child_name):
+        """New memories for a child: its cached responses stop matching"""
+        with self._lock:
+            self._bump(child_name)
+
+    def _bump(self, child_name):
+        self._generations[child_name] = self._generations.get(child_name, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries,
+                        ttl_seconds=self.ttl,
+                        hit_rate=round(self._stats['hits'] / lookups, 4) if lookups else 0.0)
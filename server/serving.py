@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Production serving for the NeoMind server
+Runs the Flask app under gunicorn's pre-fork arbiter instead of the
+single-process debug server. Workers import the app themselves, so each one
+opens its own store after the fork.
+"""
+
+import argparse
+import os
+import sys
+
+MODES = ('dev', 'prefork')
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def parse_args(argv=None):
+    """Serving options; every flag falls back to an env var from config/.env"""
+    parser = argparse.ArgumentParser(description='NeoMind knowledge server')
+    parser.add_argument('--mode', choices=MODES,
+                        default=os.environ.get('NEOMIND_SERVE_MODE', 'dev'),
+                        help='dev: Flask debug server; prefork: gunicorn workers')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=env_int('PORT', 5000))
+    parser.add_argument('--workers', type=int,
+                        default=env_int('NEOMIND_WORKERS', min(4, os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=env_int('NEOMIND_THREADS', 4),
+                        help='request threads per worker')
+    parser.add_argument('--keepalive', type=int, default=env_int('NEOMIND_KEEPALIVE', 5),
+                        help='seconds an idle keep-alive connection is held open')
+    parser.add_argument('--max-queue', type=int, default=env_int('NEOMIND_MAX_QUEUE', 64),
+                        help='connections allowed to wait for a free thread')
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=env_int('NEOMIND_GRACEFUL_TIMEOUT', 30),
+                        help='seconds in-flight requests get to finish on shutdown')
+    return parser.parse_args(argv)
+
+
+def run_prefork(app_uri, args, on_worker_exit=None):
+    """Serve `module:app` with gunicorn gthread workers until SIGTERM/SIGINT"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("❌ Prefork mode needs gunicorn: pip install gunicorn")
+
+    options = {
+        'bind': f"{args.host}:{args.port}",
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'keepalive': args.keepalive,
+        # Kernel accept queue, then per-worker connections beyond busy threads
+        'backlog': args.max_queue,
+        'worker_connections': args.threads + args.max_queue,
+        'graceful_timeout': args.graceful_timeout,
+        'timeout': max(30, args.graceful_timeout),
+        'preload_app': False,
+    }
+    if on_worker_exit:
+        options['worker_exit'] = lambda arbiter, worker: on_worker_exit()
+
+    class NeoMindApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from gunicorn.util import import_app
+            return import_app(app_uri)
+
+    NeoMindApplication().run()
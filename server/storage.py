@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Conversation storage backends for the NeoMind server
+The chat handlers only talk to a ConversationStore, so the backend can be
+swapped (in-memory for quick tests, SQLite for anything that must survive a
+restart) without touching the endpoints.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from memory_index import ChildIndex, MemoryIndex
+from turns import Speaker, Turn, turn_nbytes
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationStore:
+    """Interface every storage backend implements"""
+
+    def append(self, child_name, message, speaker):
+        """Store one turn and return it; must not block on disk I/O"""
+        raise NotImplementedError
+
+    def count(self, child_name):
+        """Number of turns stored for a child"""
+        raise NotImplementedError
+
+    def search(self, child_name, query, limit=5):
+        """Return [(Turn, score)] best first"""
+        raise NotImplementedError
+
+    def history(self, child_name, before=None, limit=50):
+        """Return [(seq, Turn)] oldest first: up to `limit` turns before `seq`
+
+        seq is a turn's 1-based position in the child's conversation; before
+        is exclusive and None means the newest turns.
+        """
+        raise NotImplementedError
+
+    def recent(self, child_name, limit):
+        """The newest `limit` turns, oldest first, including ones not yet durable"""
+        return [turn for _, turn in self.history(child_name, limit=limit)]
+
+    def flush(self):
+        """Block until every appended turn is durable"""
+
+    def close(self):
+        """Flush and release resources"""
+        self.flush()
+
+    def memory_stats(self):
+        """Bytes held per tier, for /stats/memory"""
+        raise NotImplementedError
+
+    def add_spill_hook(self, hook):
+        """Call hook(child_name, turns) with turns leaving RAM; no-op if nothing spills"""
+
+    def add_commit_hook(self, hook):
+        """Call hook(records) with [(child_name, ts_ms, speaker, message)] once stored
+
+        Backends with a background writer call it from that thread after each
+        batch, so logging turns costs the request path nothing.
+        """
+        raise NotImplementedError
+
+    def write_stats(self):
+        """Write queue depth and flush latency, for /stats/writes"""
+        return {}
+
+
+class MemoryStore(ConversationStore):
+    """Everything in process memory; lost on restart"""
+
+    def __init__(self):
+        self._conversations = {}
+        self._index = MemoryIndex()
+        self._lock = threading.Lock()
+        self._commit_hooks = []
+
+    def append(self, child_name, message, speaker):
+        turn = Turn(message, speaker)
+        with self._lock:
+            history = self._conversations.setdefault(child_name, [])
+            history.append(turn)
+            turn_id = len(history) - 1
+        self._index.add(child_name, turn_id, message)
+        # Nothing to wait for in RAM: "committed" right away
+        for hook in self._commit_hooks:
+            hook([(child_name, turn.ts_ms, int(turn.speaker), turn.message)])
+        return turn
+
+    def add_commit_hook(self, hook):
+        self._commit_hooks.append(hook)
+
+    def count(self, child_name):
+        return len(self._conversations.get(child_name, ()))
+
+    def search(self, child_name, query, limit=5):
+        history = self._conversations.get(child_name, [])
+        return [(history[turn_id], score)
+                for turn_id, score in self._index.search(child_name, query, limit)]
+
+    def history(self, child_name, before=None, limit=50):
+        with self._lock:
+            history = self._conversations.get(child_name, [])
+            end = len(history) if before is None else max(0, min(before - 1, len(history)))
+            start = max(0, end - limit)
+            return [(seq, turn) for seq, turn in enumerate(history[start:end], start + 1)]
+
+    def memory_stats(self):
+        with self._lock:
+            histories = list(self._conversations.items())
+        return {
+            'hot_bytes': sum(turn_nbytes(turn) for _, history in histories for turn in history),
+            'index_bytes': sum(self._index.child(name).nbytes for name, _ in histories),
+            'cold_bytes': 0,
+            'children_resident': len(histories)
+        }
+
+
+class _ChildState:
+    """What one process keeps in RAM for a child: index and hot window"""
+
+    __slots__ = ('index', 'indexed_id', 'index_lock', 'hot', 'hot_bytes', 'loaded', 'last_id',
+                 'count', 'lock')
+
+    def __init__(self, hot_turns):
+        self.index = ChildIndex()
+        self.indexed_id = 0                  # newest row in the index; built on first search
+        self.index_lock = threading.Lock()
+        self.hot = deque(maxlen=hot_turns)   # (turn_id, turn), oldest first
+        self.hot_bytes = 0
+        self.loaded = False
+        self.last_id = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + self.hot_bytes
+
+
+class SQLiteStore(ConversationStore):
+    """Append-only turn log in SQLite (WAL mode) with a background writer
+
+    Appends go to an in-memory batch that a writer thread commits every
+    `flush_interval` seconds or once `batch_size` turns are waiting, so each
+    fsync covers a whole batch. Once `max_pending` turns are queued, append
+    waits for the next batch to commit, never longer. Commit hooks run on the
+    writer thread after each batch (e.g. the turn log), and write_stats()
+    reports queue depth, commit time and how long turns waited to be durable.
+
+    Nothing is replayed at startup. The first time a child is touched, only
+    its row count and newest `hot_turns` rows are read; its search index is
+    built from its rows on the first search. Both are then caught up
+    incrementally, which also picks up rows written by other processes
+    sharing the database. None of this holds the writer's commit lock.
+
+    Only the newest `hot_turns` turns per child stay in RAM; older ones live
+    in the database (the cold tier) and are read back on demand. Turns leaving
+    the hot window are passed to spill hooks, e.g. a summarizer. When the
+    children resident in RAM exceed `memory_budget` bytes, the least recently
+    used ones are dropped whole and rebuilt from disk when next touched.
+    """
+
+    SCHEMA_VERSION = 1
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS turns (
+            id      INTEGER PRIMARY KEY,
+            child   TEXT NOT NULL,
+            ts_ms   INTEGER NOT NULL,
+            speaker INTEGER NOT NULL,
+            message TEXT NOT NULL
+        )""",
+        'CREATE INDEX IF NOT EXISTS turns_child ON turns (child, id)',
+    )
+
+    def __init__(self, path, flush_interval=0.05, batch_size=256, max_pending=4096,
+                 mmap_size=256 * 1024 * 1024, hot_turns=200, memory_budget=64 * 1024 * 1024):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.mmap_size = mmap_size
+        self.hot_turns = hot_turns
+        self.memory_budget = memory_budget
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._writer_conn = self._connect()
+        self._migrate(self._writer_conn)
+        for statement in self.SCHEMA:
+            self._writer_conn.execute(statement)
+        self._writer_conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        self._local = threading.local()
+
+        self._children = OrderedDict()       # least recently used first
+        self._children_lock = threading.Lock()
+        self._spill_hooks = []
+        self._commit_hooks = []
+        self._evictions = 0
+
+        self._pending = []
+        self._committing = []                # batch taken by the writer, not yet on disk
+        self._pending_counts = {}
+        self._appended = 0
+        self._committed = 0
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        # Held across a commit and its pending-count update so count() never
+        # sees a batch both on disk and still pending, or in neither place
+        self._commit_lock = threading.Lock()
+        self._closed = False
+        self._writes = {'batches': 0, 'largest_batch': 0, 'commit_ms': 0.0, 'commit_ms_max': 0.0,
+                        'lag_ms': 0.0, 'lag_ms_max': 0.0, 'backpressure_waits': 0,
+                        'backpressure_ms': 0.0, 'hook_errors': 0}
+        self._writer = threading.Thread(target=self._write_loop, name='neomind-store-writer',
+                                        daemon=True)
+        self._writer.start()
+
+    # ---------- Connections ----------
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # FULL: every batch commit is one fsync of the WAL
+        conn.execute('PRAGMA synchronous=FULL')
+        # Read older pages straight from the mapped file
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        """Convert databases written with ISO-string timestamps (user_version 0)"""
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= 1:
+            return
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(turns)')]
+        if 'ts' not in columns:
+            return
+        logger.info("Migrating conversation store to integer timestamps...")
+        speakers = {speaker.label: int(speaker) for speaker in Speaker}
+        conn.execute('BEGIN')
+        conn.execute('ALTER TABLE turns RENAME TO turns_v0')
+        conn.execute('DROP INDEX IF EXISTS turns_child')
+        for statement in SQLiteStore.SCHEMA:
+            conn.execute(statement)
+        rows = conn.execute('SELECT id, child, ts, type, message FROM turns_v0 ORDER BY id')
+        conn.executemany(
+            'INSERT INTO turns (id, child, ts_ms, speaker, message) VALUES (?, ?, ?, ?, ?)',
+            ((turn_id, child, int(datetime.fromisoformat(ts).timestamp() * 1000),
+              speakers.get(turn_type, int(Speaker.USER)), message)
+             for turn_id, child, ts, turn_type, message in rows))
+        conn.execute('DROP TABLE turns_v0')
+        conn.execute(f'PRAGMA user_version = {SQLiteStore.SCHEMA_VERSION}')
+        conn.execute('COMMIT')
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------- Writes ----------
+    def append(self, child_name, message, speaker):
+        turn = Turn(message, speaker)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('conversation store is closed')
+            if len(self._pending) >= self.max_pending:
+                waited = time.perf_counter()
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: len(self._pending) < self.max_pending or self._closed)
+                self._writes['backpressure_waits'] += 1
+                self._writes['backpressure_ms'] += (time.perf_counter() - waited) * 1000
+                if self._closed:
+                    # The writer may already have drained its last batch
+                    raise RuntimeError('conversation store is closed')
+            self._pending.append((child_name, turn.ts_ms, int(turn.speaker), turn.message))
+            self._appended += 1
+            self._pending_counts[child_name] = self._pending_counts.get(child_name, 0) + 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return turn
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.batch_size
+                                    or self._flush_requested or self._closed,
+                                    timeout=self.flush_interval)
+                self._flush_requested = False
+                batch, self._pending = self._pending, []
+                self._committing = batch
+                closed = self._closed
+            with self._commit_lock:
+                if batch:
+                    started = time.perf_counter()
+                    self._commit(batch)
+                    commit_ms = (time.perf_counter() - started) * 1000
+                    # Oldest turn in the batch: how long it waited to be durable
+                    lag_ms = time.time() * 1000 - batch[0][1]
+                with self._cond:
+                    self._committing = []
+                    for child_name, *_ in batch:
+                        remaining = self._pending_counts[child_name] - 1
+                        if remaining:
+                            self._pending_counts[child_name] = remaining
+                        else:
+                            del self._pending_counts[child_name]
+                    self._committed += len(batch)
+                    if batch:
+                        writes = self._writes
+                        writes['batches'] += 1
+                        writes['largest_batch'] = max(writes['largest_batch'], len(batch))
+                        writes['commit_ms'] += commit_ms
+                        writes['commit_ms_max'] = max(writes['commit_ms_max'], commit_ms)
+                        writes['lag_ms'] += lag_ms
+                        writes['lag_ms_max'] = max(writes['lag_ms_max'], lag_ms)
+                    self._cond.notify_all()
+            if batch:
+                self._run_commit_hooks(batch)
+            if closed and not self._pending:
+                return
+
+    def _commit(self, batch):
+        conn = self._writer_conn
+        try:
+            conn.execute('BEGIN')
+            conn.executemany('INSERT INTO turns (child, ts_ms, speaker, message) VALUES (?, ?, ?, ?)',
+                             batch)
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            logger.error(f"Store write failed, {len(batch)} turns lost: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+
+    def _run_commit_hooks(self, batch):
+        for hook in self._commit_hooks:
+            try:
+                hook(batch)
+            except Exception as e:
+                self._writes['hook_errors'] += 1
+                logger.error(f"Commit hook failed: {e}")
+
+    def add_commit_hook(self, hook):
+        self._commit_hooks.append(hook)
+
+    def write_stats(self):
+        with self._cond:
+            writes = dict(self._writes)
+            pending = len(self._pending)
+            appended, committed = self._appended, self._committed
+        batches = writes['batches'] or 1
+        return {
+            'pending_turns': pending,
+            'max_pending': self.max_pending,
+            'appended': appended,
+            'committed': committed,
+            'batches': writes['batches'],
+            'largest_batch': writes['largest_batch'],
+            'commit_ms_avg': round(writes['commit_ms'] / batches, 2),
+            'commit_ms_max': round(writes['commit_ms_max'], 2),
+            'lag_ms_avg': round(writes['lag_ms'] / batches, 1),
+            'lag_ms_max': round(writes['lag_ms_max'], 1),
+            'backpressure_waits': writes['backpressure_waits'],
+            'backpressure_ms': round(writes['backpressure_ms'], 1),
+            'hook_errors': writes['hook_errors']
+        }
+
+    def flush(self):
+        with self._cond:
+            target = self._appended
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._committed >= target or not self._writer.is_alive())
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._writer_conn.close()
+
+    # ---------- Tiers ----------
+    def add_spill_hook(self, hook):
+        """Call hook(child_name, turns) with turns leaving the hot window"""
+        self._spill_hooks.append(hook)
+
+    def _child(self, child_name):
+        """Child state, caught up with every committed row"""
+        with self._children_lock:
+            state = self._children.get(child_name)
+            if state is None:
+                state = self._children[child_name] = _ChildState(self.hot_turns)
+            else:
+                self._children.move_to_end(child_name)
+
+        self._spill(child_name, self._catch_up(child_name, state))
+        self._enforce_budget(child_name)
+        return state
+
+    def _catch_up(self, child_name, state):
+        """Load or advance a child's count and hot window; return the turns spilled"""
+        spilled = []
+        conn = self._reader()
+        with state.lock:
+            if not state.loaded:
+                # Count and newest rows only: the older turns stay on disk
+                last_id, count = conn.execute(
+                    'SELECT MAX(id), COUNT(*) FROM turns WHERE child = ?', (child_name,)).fetchone()
+                rows = conn.execute(
+                    'SELECT id, ts_ms, speaker, message FROM turns WHERE child = ? AND id <= ? '
+                    'ORDER BY id DESC LIMIT ?', (child_name, last_id or 0, self.hot_turns))
+                for turn_id, ts_ms, speaker, message in reversed(rows.fetchall()):
+                    turn = Turn(message, speaker, ts_ms)
+                    state.hot.append((turn_id, turn))
+                    state.hot_bytes += turn_nbytes(turn)
+                state.last_id, state.count, state.loaded = last_id or 0, count, True
+                return spilled
+            rows = conn.execute(
+                'SELECT id, ts_ms, speaker, message FROM turns WHERE child = ? AND id > ? ORDER BY id',
+                (child_name, state.last_id))
+            for turn_id, ts_ms, speaker, message in rows:
+                turn = Turn(message, speaker, ts_ms)
+                if len(state.hot) == state.hot.maxlen:
+                    _, old = state.hot[0]
+                    state.hot_bytes -= turn_nbytes(old)
+                    spilled.append(old)
+                state.hot.append((turn_id, turn))
+                state.hot_bytes += turn_nbytes(turn)
+                state.last_id = turn_id
+                state.count += 1
+        return spilled
+
+    def _spill(self, child_name, turns):
+        if not turns:
+            return
+        for hook in self._spill_hooks:
+            try:
+                hook(child_name, turns)
+            except Exception as e:
+                logger.error(f"Spill hook failed for {child_name}: {e}")
+
+    def _indexed(self, child_name, state):
+        """The child's search index, caught up with every committed row"""
+        with state.index_lock:
+            rows = self._reader().execute(
+                'SELECT id, message FROM turns WHERE child = ? AND id > ? ORDER BY id',
+                (child_name, state.indexed_id))
+            for turn_id, message in rows:
+                state.index.add(turn_id, message)
+                state.indexed_id = turn_id
+        return state.index
+
+    def _enforce_budget(self, keep):
+        with self._children_lock:
+            total = sum(state.nbytes for state in self._children.values())
+            while total > self.memory_budget and len(self._children) > 1:
+                child_name = next(iter(self._children))
+                if child_name == keep:
+                    self._children.move_to_end(keep)
+                    child_name = next(iter(self._children))
+                total -= self._children.pop(child_name).nbytes
+                self._evictions += 1
+                logger.info(f"Evicted {child_name} from memory, {total} bytes resident")
+
+    def _cold_turns(self, ids):
+        placeholders = ','.join('?' * len(ids))
+        rows = self._reader().execute(
+            f'SELECT id, ts_ms, speaker, message FROM turns WHERE id IN ({placeholders})', ids)
+        return {turn_id: Turn(message, speaker, ts_ms)
+                for turn_id, ts_ms, speaker, message in rows}
+
+    def memory_stats(self):
+        with self._children_lock:
+            states = list(self._children.values())
+        cold_bytes = 0
+        for suffix in ('', '-wal'):
+            try:
+                cold_bytes += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {
+            'hot_bytes': sum(state.hot_bytes for state in states),
+            'index_bytes': sum(state.index.nbytes for state in states),
+            'cold_bytes': cold_bytes,
+            'pending_turns': len(self._pending),
+            'children_resident': len(states),
+            'evictions': self._evictions,
+            'memory_budget': self.memory_budget
+        }
+
+    # ---------- Reads ----------
+
+    def count(self, child_name):
+        # Loading a child can take a while; do it before blocking the writer
+        state = self._child(child_name)
+        with self._commit_lock:
+            # Only rows committed since: at most a batch or so
+            spilled = self._catch_up(child_name, state)
+            count = state.count + self._pending_counts.get(child_name, 0)
+        self._spill(child_name, spilled)
+        return count
+
+    def recent(self, child_name, limit):
+        if not limit:
+            return []
+        _, hot, queued = self._snapshot(child_name)
+        return ([turn for _, turn in hot[-limit:]] + queued)[-limit:]
+
+    def search(self, child_name, query, limit=5):
+        if self._pending_counts.get(child_name):
+            # Queued turns have no row id to index yet; commit them first
+            self.flush()
+        state = self._child(child_name)
+        index = self._indexed(child_name, state)
+        self._enforce_budget(child_name)
+        hits = index.search(query, limit)
+        if not hits:
+            return []
+        with state.lock:
+            turns = {turn_id: turn for turn_id, turn in state.hot}
+        missing = [turn_id for turn_id, _ in hits if turn_id not in turns]
+        if missing:
+            turns.update(self._cold_turns(missing))
+        return [(turns[turn_id], score) for turn_id, score in hits if turn_id in turns]
+
+    def history(self, child_name, before=None, limit=50):
+        """Queued turns come last; the newest committed pages come from the hot window"""
+        committed, hot, queued = self._snapshot(child_name)
+        count = committed + len(queued)
+        end = count if before is None else max(0, min(before - 1, count))
+        start = max(0, end - limit)
+        turns = []
+        if start < committed:
+            stop = min(end, committed)
+            first_hot = committed - len(hot)
+            if start >= first_hot:
+                turns = [turn for _, turn in hot[start - first_hot:stop - first_hot]]
+            else:
+                rows = self._reader().execute(
+                    'SELECT ts_ms, speaker, message FROM turns WHERE child = ? '
+                    'ORDER BY id LIMIT ? OFFSET ?', (child_name, stop - start, start))
+                turns = [Turn(message, speaker, ts_ms) for ts_ms, speaker, message in rows]
+        if end > committed:
+            turns += queued[max(start, committed) - committed:end - committed]
+        return list(enumerate(turns, start + 1))
+
+    def _snapshot(self, child_name):
+        """(committed count, hot window, queued turns) for a child at one instant
+
+        Taken under the commit lock, as in count(), so every turn is in
+        exactly one of them.
+        """
+        state = self._child(child_name)
+        with self._commit_lock:
+            spilled = self._catch_up(child_name, state)
+            with state.lock:
+                committed, hot = state.count, list(state.hot)
+            with self._cond:
+                queued = [record for record in self._committing + self._pending
+                          if record[0] == child_name]
+        self._spill(child_name, spilled)
+        return committed, hot, [Turn(message, speaker, ts_ms)
+                                for _, ts_ms, speaker, message in queued]
+
+def open_store(kind, path=None, **options):
+    """Create the backend named by NEOMIND_STORE"""
+    if kind == 'memory':
+        # Unbounded by design: nothing to spill to
+        return MemoryStore()
+    if kind == 'sqlite':
+        return SQLiteStore(path, **options)
+    raise ValueError(f"Unknown conversation store: {kind}")
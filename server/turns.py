@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compact conversation turn records
+A stored turn used to be a dict of strings; a Turn keeps an epoch-millisecond
+int, a shared Speaker member and the message, and only formats an ISO
+timestamp when a response needs one.
+"""
+
+import sys
+import time
+from datetime import datetime
+from enum import IntEnum
+
+
+class Speaker(IntEnum):
+    USER = 0
+    NEO = 1
+
+    @property
+    def label(self):
+        """Wire name used in API payloads ('user' / 'neo')"""
+        return self.name.lower()
+
+
+class Turn:
+    """One message in a child's conversation"""
+
+    __slots__ = ('ts_ms', 'speaker', 'message')
+
+    def __init__(self, message, speaker, ts_ms=None):
+        self.ts_ms = int(time.time() * 1000) if ts_ms is None else ts_ms
+        self.speaker = Speaker(speaker)
+        self.message = message
+
+    @property
+    def timestamp(self):
+        """Local ISO-8601 time, formatted on demand"""
+        return datetime.fromtimestamp(self.ts_ms / 1000).isoformat(timespec='milliseconds')
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'message': self.message,
+            'type': self.speaker.label
+        }
+
+    def __repr__(self):
+        return f"Turn({self.message!r}, {self.speaker.name}, ts_ms={self.ts_ms})"
+
+
+def turn_nbytes(turn):
+    """Approximate resident size of a turn (message counted in full)"""
+    return sys.getsizeof(turn) + sys.getsizeof(turn.ts_ms) + sys.getsizeof(turn.message)
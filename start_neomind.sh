@@ -18,6 +18,13 @@ fi
 echo "🐍 Activating environment..."
 source neomind_env/bin/activate
 
+# Load configuration
+if [ -f "config/.env" ]; then
+    set -a
+    source config/.env
+    set +a
+fi
+
 # Suppress audio warnings
 export ALSA_SUPPRESS_ERRORS=1
 export PYTHONWARNINGS=ignore
@@ -32,7 +39,7 @@ else
     
     # Start server in background
     cd server
-    python neomind_server.py &
+    python neomind_server.py --mode "${NEOMIND_SERVE_MODE:-prefork}" &
     SERVER_PID=$!
     cd ..
     
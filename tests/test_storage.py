@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Reads straight after a write see the turn, with no sleep and no flush()
+The SQLite store's writer is held off with a long flush interval, so every
+turn appended here is still queued when it is read back.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from storage import MemoryStore, SQLiteStore
+from turns import Speaker
+
+
+class ReadYourWritesTest(unittest.TestCase):
+
+    def stores(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        sqlite = SQLiteStore(os.path.join(directory.name, 'conversations.db'),
+                             flush_interval=60, hot_turns=3)
+        self.addCleanup(sqlite.close)
+        return {'memory': MemoryStore(), 'sqlite': sqlite}
+
+    def test_reads_include_queued_turns(self):
+        for name, store in self.stores().items():
+            with self.subTest(store=name):
+                store.append('ana', 'my dog is called biscuit', Speaker.USER)
+                store.append('ana', 'What a lovely name!', Speaker.NEO)
+
+                self.assertEqual(store.count('ana'), 2)
+                self.assertEqual([turn.message for turn in store.recent('ana', 1)],
+                                 ['What a lovely name!'])
+                self.assertEqual([(seq, turn.message) for seq, turn in store.history('ana')],
+                                 [(1, 'my dog is called biscuit'), (2, 'What a lovely name!')])
+                hits = store.search('ana', 'biscuit')
+                self.assertEqual([turn.message for turn, _ in hits], ['my dog is called biscuit'])
+
+    def test_history_spans_disk_hot_window_and_queue(self):
+        store = self.stores()['sqlite']
+        for i in range(6):
+            store.append('ana', f'turn {i}', Speaker.USER)
+        store.flush()
+        for i in range(6, 8):
+            store.append('ana', f'turn {i}', Speaker.USER)
+
+        expected = [(seq, f'turn {seq - 1}') for seq in range(1, 9)]
+        self.assertEqual([(seq, turn.message) for seq, turn in store.history('ana')], expected)
+        # Pages: cold rows only, cold into hot, hot into queued, queued only
+        for before, limit in ((3, 2), (5, 3), (8, 3), (9, 1)):
+            page = [(seq, turn.message) for seq, turn in store.history('ana', before, limit)]
+            self.assertEqual(page, expected[max(0, before - 1 - limit):before - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()